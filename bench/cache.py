@@ -0,0 +1,105 @@
+"""Measure concurrent first access to plugins through a PluginCache, and repeated access to a missing plugin.
+
+A number of threads simultaneously access the same plugin of a fresh cache, whose loading is slowed to stand in for
+an expensive import, counting the loads performed. The previous cache, lacking any coordination, is included for
+comparison. Repeated lookups of a plugin name not present are then timed with and without negative caching.
+
+Finally, many distinct plugins, each a class no longer referenced once used, are loaded through unbounded, bounded,
+and weak caches, reporting the plugins retained, the memory they occupy, and the cost of a cache hit. Run from the
+project root:
+
+	python bench/cache.py [threads]
+"""
+
+import gc
+import sys
+
+from collections import defaultdict
+from threading import Barrier, Thread
+from time import sleep
+from timeit import repeat
+from tracemalloc import get_traced_memory, start, stop
+
+from marrow.package import cache
+from marrow.package.cache import PluginCache
+from marrow.package.loader import load
+
+NAMESPACE = 'marrow.package.sample'
+PLUGINS = 10000  # Distinct plugins loaded by each bounded cache.
+
+
+class Uncoordinated(defaultdict):
+	"""The previous implementation, loading within `__missing__` without coordination."""
+	
+	def __init__(self, namespace):
+		super().__init__()
+		self.namespace = namespace
+	
+	def __missing__(self, key):
+		self[key] = cache.load(key, self.namespace)
+		return self[key]
+
+
+def stampede(plugins, threads):
+	barrier = Barrier(threads)
+	
+	def work():
+		barrier.wait()
+		plugins['load']
+	
+	workers = [Thread(target=work) for i in range(threads)]
+	
+	for worker in workers: worker.start()
+	for worker in workers: worker.join()
+
+
+def absent(plugins):
+	try:
+		plugins['missing']
+	except LookupError:
+		pass
+
+
+if __name__ == '__main__':
+	threads = int(sys.argv[1]) if sys.argv[1:] else 16
+	loads = []
+	
+	def slow(name, namespace):
+		loads.append(name)
+		sleep(0.01)
+		return load(name, namespace)
+	
+	cache.load = slow
+	
+	for label, cls in (("uncoordinated", Uncoordinated), ("PluginCache", PluginCache)):
+		del loads[:]
+		stampede(cls(NAMESPACE), threads)
+		print(f"{label:<28} {len(loads):>4} loads by {threads} threads")
+	
+	cache.load = load
+	print()
+	
+	for label, plugins in (("not remembered", PluginCache(NAMESPACE, ttl=0)), ("remembered", PluginCache(NAMESPACE))):
+		number = 10000
+		elapsed = min(repeat(lambda: absent(plugins), number=number, repeat=5)) / number
+		print(f"{label:<28} {elapsed * 1e6:8.2f} µs per lookup of a missing plugin")
+	
+	print()
+	cache.load = lambda name, namespace: type(name, (), {})
+	
+	for label, options in (("unbounded", {}), ("maxsize=100", {'maxsize': 100}), ("weak", {'weak': True})):
+		plugins = PluginCache(NAMESPACE, **options)
+		gc.collect()
+		start()
+		
+		for i in range(PLUGINS):
+			plugins['plugin' + str(i)]
+		
+		gc.collect()
+		used = get_traced_memory()[0]
+		stop()
+		
+		plugins['hot']
+		elapsed = min(repeat(lambda: plugins['hot'], number=100000, repeat=5)) / 100000
+		
+		print(f"{label:<16} {len(plugins):>6} retained {used / 1024:10.1f} KiB  {elapsed * 1e9:6.0f} ns per hit")
@@ -0,0 +1,39 @@
+"""Measure canonical name resolution, both direct and against a plugin namespace.
+
+Run from the project root, after installing the package (to register the sample namespace):
+
+	python bench/canonical.py
+"""
+
+from inspect import getmodule
+from timeit import repeat
+
+from marrow.package.canonical import name
+from marrow.package.index import entry_points
+from marrow.package.loader import traverse
+
+NAMESPACE = 'marrow.package.sample'
+
+
+def scan(obj):
+	"""The approach previously used by `name`, comparing against every entry point in the namespace on every call."""
+	
+	reference = getmodule(obj).__name__ + ':' + obj.__qualname__
+	
+	for plugin, entry in entry_points[NAMESPACE].items():
+		if entry.reference == reference:
+			return plugin
+
+
+def measure(label, stmt, number=50000):
+	best = min(repeat(stmt, number=number, repeat=5)) / number
+	print(f"{label:<32} {best * 1e6:10.3f} µs/call")
+	return best
+
+
+if __name__ == '__main__':
+	before = measure("scan namespace", lambda: scan(traverse))
+	after = measure("name(obj, namespace)", lambda: name(traverse, NAMESPACE))
+	print(f"{'speedup':<32} {before / after:10.1f}×\n")
+	
+	measure("name(obj)", lambda: name(traverse))
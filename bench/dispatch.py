@@ -0,0 +1,65 @@
+"""Compare per-request hook dispatch by attribute probing against a precompiled dispatch plan.
+
+Run from the project root:
+
+	python bench/dispatch.py [count]
+"""
+
+import sys
+
+from timeit import repeat
+
+from marrow.package.host import ExtensionManager
+
+
+class Extension:
+	def __init__(self, index):
+		self.provides = ('feature-' + str(index), )
+		self.needs = ('feature-' + str(index - 1), ) if index else ()
+		
+		if index % 3:
+			self.prepare = self.hook  # Only some extensions implement any given hook.
+		
+		if index % 2:
+			self.after = self.hook
+	
+	def hook(self, context):
+		return context
+
+
+def probe(extensions, context):
+	"""The per-request approach of walking the ordered extensions, probing each for each hook."""
+	
+	for ext in extensions:
+		if hasattr(ext, 'prepare'):
+			ext.prepare(context)
+	
+	for ext in reversed(extensions):
+		if hasattr(ext, 'after'):
+			getattr(ext, 'after')(context)
+
+
+def dispatch(plan, context):
+	for callback in plan['prepare']:
+		callback(context)
+	
+	for callback in plan.reverse('after'):
+		callback(context)
+
+
+def measure(label, stmt, number=20000):
+	best = min(repeat(stmt, number=number, repeat=5)) / number
+	print(f"{label:<40} {best * 1e6:10.3f} µs/request")
+	return best
+
+
+if __name__ == '__main__':
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+	manager = ExtensionManager('marrow.package.sample')
+	extensions = [Extension(i) for i in range(count)]
+	ordered = manager.order(extensions)
+	plan = manager.plan(extensions, hooks=('prepare', 'after'))
+	
+	before = measure(f"probe, {count} extensions", lambda: probe(ordered, None))
+	after = measure("  dispatch plan", lambda: dispatch(plan, None))
+	print(f"{'  speedup':<40} {before / after:10.1f}×")
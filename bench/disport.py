@@ -0,0 +1,78 @@
+"""Compare resolution of redirected imports by scanning every redirect against the indexed and cached Importer.
+
+Each of a number of components is overridden twice: once by a theme whose module is missing, falling through, and once
+by one which succeeds. A burst of imports then resolves randomly chosen components. Runtime type checking of each call
+dominates the cost of a cached resolution; set `MARROW_PACKAGE_UNCHECKED=1` to measure without it. Run from the
+project root:
+
+Finally, an overridden module name is imported repeatedly through the Importer, and with the Importer installed as a
+`sys.meta_path` finder, through the import system, which caches the redirected module in `sys.modules`. A redirected
+plugin name is compared against loading the plugin through its namespace without an Importer.
+
+	python bench/disport.py [count ...]
+"""
+
+import sys
+
+from importlib import import_module
+from random import Random
+from timeit import repeat
+
+from marrow.package.disport import Importer
+from marrow.package.loader import load
+
+SEPARATORS = ('.', ':', '/')
+BURST = 1000  # Imports per measurement.
+
+
+def scanning(redirects, target):
+	"""The previous approach of attempting every redirect whose source prefixes the target, most recent first."""
+	
+	for source, destination in redirects:
+		if not target.startswith(source):
+			continue
+		
+		obj = load(target.replace(source, destination, 1), default=None, separators=SEPARATORS)
+		
+		if obj is not None:
+			return obj
+	
+	return load(target, separators=SEPARATORS)
+
+
+def measure(fn, number=3):
+	return min(repeat(fn, number=number, repeat=3)) / number / BURST
+
+
+if __name__ == '__main__':
+	counts = [int(i) for i in sys.argv[1:]] or [10, 100, 1000]
+	rng = Random(42)
+	
+	for count in counts:
+		importer = Importer(separators=SEPARATORS)
+		
+		for i in range(count):
+			importer.redirect(f'site.component{i}', 'collections')
+			importer.redirect(f'site.component{i}', f'theme{i}.missing')
+		
+		targets = [f'site.component{rng.randrange(count)}:OrderedDict' for i in range(BURST)]
+		
+		before = measure(lambda: [scanning(importer.redirects, target) for target in targets])
+		after = measure(lambda: [importer(target) for target in targets])
+		
+		print(f"{count:>5} components: scanning {before * 1e6:10.2f} µs  indexed {after * 1e6:8.2f} µs  {before / after:8.1f}×")
+	
+	importer = Importer([('theme_page', 'collections')], separators=SEPARATORS)
+	called = measure(lambda: [importer('theme_page') for i in range(BURST)])
+	
+	importer.install()
+	imported = measure(lambda: [import_module('theme_page') for i in range(BURST)])
+	importer.uninstall()
+	
+	print(f"module import: Importer {called * 1e6:10.2f} µs  meta path finder {imported * 1e6:8.2f} µs")
+	
+	plugins = Importer([('traverse', 'marrow.package.lazy')], namespace='marrow.package.sample', separators=SEPARATORS)
+	direct = measure(lambda: [load('traverse', 'marrow.package.sample') for i in range(BURST)])
+	redirected = measure(lambda: [plugins('traverse') for i in range(BURST)])
+	
+	print(f"plugin name:   load     {direct * 1e6:10.2f} µs  redirected       {redirected * 1e6:8.2f} µs")
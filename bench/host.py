@@ -0,0 +1,72 @@
+"""Compare eager and lazy plugin manager construction against a namespace of many generated plugins.
+
+Each plugin lives in its own module, which allocates a modest amount of memory at import time. Run from the project
+root:
+
+	python bench/host.py [count]
+"""
+
+import sys
+
+from tempfile import mkdtemp
+from time import perf_counter
+from tracemalloc import get_traced_memory, start, stop
+from pathlib import Path
+
+from marrow.package.host import PluginManager
+
+NAMESPACE = 'marrow.package.bench'
+
+
+def generate(count):
+	root = Path(mkdtemp())
+	metadata = root / 'benchplugins-1.0.dist-info'
+	metadata.mkdir()
+	(metadata / 'METADATA').write_text("Metadata-Version: 2.1\nName: benchplugins\nVersion: 1.0\n")
+	
+	entries = ["[" + NAMESPACE + "]"]
+	
+	for i in range(count):
+		(root / f'benchplugin_{i}.py').write_text(f"table = list(range(1000))\n\nclass Plugin{i}:\n\tpass\n")
+		entries.append(f"plugin{i} = benchplugin_{i}:Plugin{i}")
+	
+	(metadata / 'entry_points.txt').write_text('\n'.join(entries) + '\n')
+	sys.path.insert(0, str(root))
+
+
+def purge():
+	for name in [name for name in sys.modules if name.startswith('benchplugin_')]:
+		del sys.modules[name]
+
+
+def measure(label, construct, use=()):
+	purge()
+	start()
+	began = perf_counter()
+	
+	manager = construct()
+	
+	for name in use:
+		manager[name]
+	
+	duration = perf_counter() - began
+	memory = get_traced_memory()[1]
+	stop()
+	
+	print(f"{label:<40} {duration * 1000:9.2f} ms {memory / 1024:11.1f} KiB peak")
+
+
+if __name__ == '__main__':
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+	used = [f'plugin{i}' for i in range(0, count, max(count // 12, 1))]
+	
+	generate(count)
+	PluginManager(NAMESPACE, lazy=True)  # Warm the entry point index.
+	
+	measure(f"eager, {count} plugins", lambda: PluginManager(NAMESPACE))
+	measure("lazy, none used", lambda: PluginManager(NAMESPACE, lazy=True))
+	measure(f"lazy, {len(used)} used", lambda: PluginManager(NAMESPACE, lazy=True), used)
+	measure("lazy, preloaded", lambda: PluginManager(NAMESPACE, lazy=True).preload())
+	
+	for threads in (2, 4, 8):
+		measure(f"lazy, warmed using {threads} threads", lambda: PluginManager(NAMESPACE, lazy=True).warm(threads))
@@ -0,0 +1,52 @@
+"""Compare plugin resolution via the entry point index against a full working set scan.
+
+Also compares the cold-start cost of building the index by scanning installed metadata against restoring it from an
+on-disk snapshot.
+
+Run from the project root, after installing the package (to register the sample namespace):
+
+	python bench/index.py
+"""
+
+import os
+
+from pkg_resources import iter_entry_points
+from tempfile import mkdtemp
+from timeit import repeat
+
+from marrow.package.index import EntryPointIndex, entry_points, fingerprint
+from marrow.package.loader import load
+
+NAMESPACE = 'marrow.package.sample'
+
+
+def scan(name):
+	"""The approach previously used by `load`, rebuilding the namespace mapping on every call."""
+	return dict((i.name, i) for i in iter_entry_points(NAMESPACE))[name]
+
+
+def indexed(name):
+	return entry_points.lookup(NAMESPACE, name)
+
+
+def measure(label, stmt, number=10000):
+	best = min(repeat(stmt, number=number, repeat=5)) / number
+	print(f"{label:<32} {best * 1e6:10.3f} µs/call")
+	return best
+
+
+if __name__ == '__main__':
+	before = measure("scan working set", lambda: scan('traverse'))
+	after = measure("entry point index", lambda: indexed('traverse'))
+	print(f"{'speedup':<32} {before / after:10.1f}×\n")
+
+	measure("load(name, namespace)", lambda: load('traverse', NAMESPACE))
+	measure("full rebuild", lambda: (entry_points.invalidate(), entry_points.table), number=20)
+	
+	print("\nCold start:")
+	snapshot = os.path.join(mkdtemp(), 'entry-points.json')
+	EntryPointIndex(snapshot).table
+	
+	measure("scan installed metadata", lambda: EntryPointIndex().table, number=20)
+	measure("restore from snapshot", lambda: EntryPointIndex(snapshot).table, number=20)
+	measure("  of which fingerprinting", fingerprint, number=20)
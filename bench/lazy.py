@@ -0,0 +1,168 @@
+"""Measure the throughput of first access to lazy attributes across threads, and the memory used to cache them.
+
+Each thread creates its own instances, accessing a lazy attribute whose calculation blocks for one millisecond, standing
+in for I/O. With a single lock shared by all instances, as previously used, these calculations are serialized and
+throughput is flat regardless of thread count; with per-instance locking it scales with the number of threads.
+
+Memory use per instance, having calculated a lazy attribute, is compared between instances with a `__dict__`, those
+using `__slots__` with a designated slot, and those using `__slots__` with values held by the descriptor.
+
+Finally, many tasks concurrently await an attribute calculated by a coroutine, standing in for a remote lookup,
+comparing the number of calls made by a method caching its result once awaited against `alazy`. Run from the project
+root:
+
+	python bench/lazy.py [threads ...]
+"""
+
+import asyncio
+import sys
+
+from threading import RLock, Thread
+from time import perf_counter, sleep
+from tracemalloc import get_traced_memory, start, stop
+
+from marrow.package.lazy import alazy, lazy, sentinel
+
+INSTANCES = 50  # Per thread.
+POPULATION = 100000  # Instances for memory measurement.
+AWAITERS = 100  # Tasks concurrently awaiting one attribute.
+
+
+class shared(lazy):
+	"""The previous implementation, taking a single lock per descriptor, shared by every instance."""
+	
+	def __init__(self, func):
+		super().__init__(func)
+		self.lock = RLock()
+	
+	def __get__(self, instance, type=None):
+		if instance is None:
+			return self
+		
+		with self.lock:
+			value = instance.__dict__.get(self.__name__, sentinel)
+			
+			if value is sentinel:
+				value = instance.__dict__[self.__name__] = self.func(instance)
+		
+		return value
+
+
+def io():
+	sleep(0.001)
+	return 42
+
+
+class Contended:
+	value = shared(lambda self: io())
+
+
+class Uncontended:
+	value = lazy(lambda self: io())
+
+
+class Dictionary:
+	def __init__(self):
+		self.request = None
+		self.response = None
+	
+	value = lazy(lambda self: 42, 'value')
+
+
+class Slotted:
+	__slots__ = ('request', 'response', '_value')
+	
+	def __init__(self):
+		self.request = None
+		self.response = None
+	
+	value = lazy(lambda self: 42, 'value', slot='_value')
+
+
+class Tabled:
+	__slots__ = ('request', 'response', '__weakref__')
+	
+	def __init__(self):
+		self.request = None
+		self.response = None
+	
+	value = lazy(lambda self: 42, 'value')
+
+
+class Awaited:
+	def __init__(self):
+		self.calls = 0
+		self.cached = sentinel
+	
+	async def lookup(self):
+		self.calls += 1
+		await asyncio.sleep(0.01)
+		return 42
+	
+	async def naive(self):
+		"""Cache the result once awaited; every task arriving beforehand repeats the lookup."""
+		
+		if self.cached is sentinel:
+			self.cached = await self.lookup()
+		
+		return self.cached
+	
+	@alazy
+	async def shared(self):
+		return await self.lookup()
+
+
+def footprint(cls):
+	"""The memory allocated per instance, including any cached in the descriptor's side table."""
+	
+	start()
+	instances = [cls() for i in range(POPULATION)]
+	
+	for instance in instances:
+		instance.value
+	
+	used = get_traced_memory()[0]
+	stop()
+	
+	return used / POPULATION
+
+
+def throughput(cls, threads):
+	def work():
+		for i in range(INSTANCES):
+			cls().value
+	
+	workers = [Thread(target=work) for i in range(threads)]
+	began = perf_counter()
+	
+	for worker in workers: worker.start()
+	for worker in workers: worker.join()
+	
+	return threads * INSTANCES / (perf_counter() - began)
+
+
+async def stampede(access):
+	obj = Awaited()
+	began = perf_counter()
+	await asyncio.gather(*(access(obj) for i in range(AWAITERS)))
+	return obj.calls, perf_counter() - began
+
+
+if __name__ == '__main__':
+	counts = [int(i) for i in sys.argv[1:]] or [1, 2, 4, 8, 16]
+	
+	for threads in counts:
+		before = throughput(Contended, threads)
+		after = throughput(Uncontended, threads)
+		print(f"{threads:>3} threads: shared lock {before:10.0f}/s  per-instance {after:10.0f}/s  {after / before:6.1f}×")
+	
+	print()
+	
+	for cls, label in ((Dictionary, "__dict__"), (Slotted, "__slots__, designated slot"), (Tabled, "__slots__, side table")):
+		print(f"{label:<28} {footprint(cls):8.1f} bytes/instance")
+	
+	print()
+	
+	for label, access in (("cached once awaited", lambda obj: obj.naive()), ("alazy", lambda obj: obj.shared)):
+		calls, elapsed = asyncio.run(stampede(access))
+		print(f"{label:<28} {calls:>5} calls by {AWAITERS} awaiters in {elapsed * 1e3:7.2f} ms")
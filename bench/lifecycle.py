@@ -0,0 +1,51 @@
+"""Compare invoking an asynchronous extension hook in sequence against the dependency-aware concurrent runner.
+
+Each synthetic extension's hook sleeps for a fixed interval, standing in for the latency of opening a connection pool
+or warming a cache.
+
+Run from the project root:
+
+	python bench/lifecycle.py [count] [delay]
+"""
+
+import asyncio
+import sys
+
+from time import perf_counter
+
+from marrow.package.host import ExtensionManager
+
+
+class Extension:
+	def __init__(self, index, delay):
+		self.delay = delay
+		self.provides = ('feature-' + str(index), )
+		self.needs = ('feature-' + str(index // 4 - 1), ) if index >= 4 else ()  # A four-way tree.
+	
+	async def start(self):
+		await asyncio.sleep(self.delay)
+
+
+async def sequential(manager, extensions):
+	for ext in manager.order(extensions):
+		await ext.start()
+
+
+def measure(label, coroutine):
+	began = perf_counter()
+	asyncio.run(coroutine)
+	duration = perf_counter() - began
+	print(f"{label:<40} {duration * 1e3:10.1f} ms")
+	return duration
+
+
+if __name__ == '__main__':
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+	delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+	manager = ExtensionManager('marrow.package.sample')
+	extensions = [Extension(i, delay) for i in range(count)]
+	
+	before = measure(f"sequential, {count} extensions", sequential(manager, extensions))
+	after = measure("  run('start')", manager.run('start', config=extensions))
+	measure("  run('start', concurrency=2)", manager.run('start', config=extensions, concurrency=2))
+	print(f"{'  speedup':<40} {before / after:10.1f}×")
@@ -0,0 +1,61 @@
+"""Compare compiled and cached accessors against the `traverse` and `load` functions.
+
+Run from the project root:
+
+	python bench/loader.py
+"""
+
+from timeit import repeat
+
+from marrow.package.cache import CachingLoader
+from marrow.package.loader import compile, compile_reference, load, traverse
+
+
+class Node:
+	def __init__(self, depth=0):
+		self.child = Node(depth + 1) if depth < 4 else None
+		self.items = [self, self]
+		self.mapping = {'key': self}
+
+
+ROOT = Node()
+
+PATHS = [
+		'child',
+		'child.child.child',
+		'items.0.mapping.key',
+		'child.items.-1.child.mapping.key',
+	]
+
+REFERENCES = [
+		'marrow.package.loader:traverse',
+		'logging.handlers:RotatingFileHandler.doRollover',
+	]
+
+
+def measure(label, stmt, number=5000):
+	best = min(repeat(stmt, number=number, repeat=5)) / number
+	print(f"{label:<48} {best * 1e6:10.3f} µs/call")
+	return best
+
+
+def compare(label, plain, optimized, variant="compiled"):
+	before = measure(label, plain)
+	after = measure("  " + variant, optimized)
+	print(f"{'  speedup':<48} {before / after:10.1f}×")
+
+
+if __name__ == '__main__':
+	for path in PATHS:
+		accessor = compile(path)
+		compare(f"traverse(obj, {path!r})", lambda: traverse(ROOT, path), lambda: accessor(ROOT))
+	
+	for reference in REFERENCES:
+		resolver = compile_reference(reference)
+		compare(f"load({reference!r})", lambda: load(reference), lambda: resolver())
+	
+	cached = CachingLoader()
+	
+	for reference in REFERENCES:
+		compare(f"load({reference!r})", lambda: load(reference), lambda: cached(reference), "cached")
+		print(f"{'  (cached)':<48} {cached.info()}")
@@ -0,0 +1,64 @@
+"""Measure extension dependency ordering, as performed by `ExtensionManager.order`, over synthetic extension sets.
+
+Also measures maintaining the ordering incrementally, using an `ExtensionGraph`, as a single extension is added and
+then removed again.
+
+Run from the project root:
+
+	python bench/order.py [count ...]
+"""
+
+import sys
+
+from random import Random
+from timeit import repeat
+
+from marrow.package.host import ExtensionGraph, ExtensionManager
+
+
+class Extension:
+	def __init__(self, index, rng, count):
+		self.provides = ('feature-' + str(index), )
+		self.needs = tuple('feature-' + str(i) for i in rng.sample(range(index), min(index, 2)))
+		self.uses = ('feature-' + str(rng.randrange(count)), ) if index % 7 == 0 else ()
+		self.uses = tuple(i for i in self.uses if int(i.rpartition('-')[2]) < index)
+	
+	def __repr__(self):
+		return self.provides[0]
+
+
+def generate(count, seed=42):
+	"""Produce a shuffled, acyclic set of extensions, each needing up to two predecessors, with first/last markers."""
+	
+	rng = Random(seed)
+	extensions = [Extension(i, rng, count) for i in range(count)]
+	extensions[0].first = True
+	extensions[-1].last = True
+	rng.shuffle(extensions)
+	
+	return extensions
+
+
+def measure(label, stmt, number):
+	best = min(repeat(stmt, number=number, repeat=3)) / number
+	print(f"{label:<48} {best * 1e3:10.3f} ms/call")
+	return best
+
+
+if __name__ == '__main__':
+	counts = [int(i) for i in sys.argv[1:]] or [10, 100, 1000, 10000]
+	manager = ExtensionManager('marrow.package.sample')
+	
+	for count in counts:
+		extensions = generate(count)
+		number = max(1, 1000 // count)
+		
+		measure(f"graph construction, {count} extensions", lambda: manager._dependencies(extensions), number)
+		measure(f"order(), {count} extensions, uncached", lambda: manager._order(extensions), number)
+		measure(f"order(), {count} extensions, cached", lambda: manager.order(extensions), number)
+		
+		graph = ExtensionGraph(extensions)
+		extra = Extension(count, Random(count), count + 1)
+		extra.needs = ('feature-' + str(count // 2), )  # Anything but the last extension's feature.
+		measure(f"ExtensionGraph, {count} extensions, build", lambda: ExtensionGraph(extensions), number)
+		measure(f"ExtensionGraph, {count} extensions, add/remove", lambda: (graph.add(extra), graph.remove(extra)), 100)
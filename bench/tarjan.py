@@ -0,0 +1,110 @@
+"""Measure strongly connected component detection and topological sorting as graphs grow from 10 to 100,000 nodes.
+
+The previous recursive formulation is included for comparison; it fails with a `RecursionError` once dependency chains
+approach the interpreter's recursion limit. Figures are given with and without runtime type checking of arguments and
+return values, which itself costs time linear in the size of the graph.
+
+The robust topological sort is measured using both the mapping-based and compact (integer-indexed) representations,
+reporting the peak memory allocated during each, as measured by `tracemalloc`. Run from the project root:
+
+	python bench/tarjan.py [count ...]
+"""
+
+import sys
+
+from random import Random
+from time import perf_counter
+from tracemalloc import get_traced_memory, start, stop
+
+from marrow.package.tarjan import robust_topological_sort, strongly_connected_components
+
+
+def recursive(graph):
+	result, stack, low = [], [], {}
+	
+	def visit(node):
+		if node in low: return
+		
+		num = len(low)
+		low[node] = num
+		stack_pos = len(stack)
+		stack.append(node)
+		
+		for successor in graph[node]:
+			visit(successor)
+			low[node] = min(low[node], low[successor])
+		
+		if num == low[node]:
+			component = tuple(stack[stack_pos:])
+			del stack[stack_pos:]
+			result.append(component)
+			
+			for item in component:
+				low[item] = len(graph)
+	
+	for node in graph:
+		visit(node)
+	
+	return result
+
+
+def chain(count):
+	graph = {i: [i + 1] for i in range(count - 1)}
+	graph[count - 1] = []
+	return graph
+
+
+def sparse(count, seed=42):
+	"""A random graph averaging three successors per node, with occasional back-edges forming cycles."""
+	
+	rng = Random(seed)
+	return {i: [rng.randrange(count) if rng.random() < 0.02 else rng.randrange(i, count) for j in range(3)] \
+			for i in range(count)}
+
+
+def cycle(count):
+	"""A single strongly connected component encompassing every node."""
+	
+	return {i: [(i + 1) % count, (i + 7) % count] for i in range(count)}
+
+
+def measure(label, fn, graph):
+	began = perf_counter()
+	
+	try:
+		fn(graph)
+	except RecursionError:
+		print(f"{label:<44} {'RecursionError':>14}")
+		return
+	
+	print(f"{label:<44} {(perf_counter() - began) * 1e3:11.3f} ms")
+
+
+def peak(label, fn, graph):
+	start()
+	fn(graph)
+	print(f"{label:<44} {get_traced_memory()[1] / 1024:11.1f} KiB peak")
+	stop()
+
+
+if __name__ == '__main__':
+	counts = [int(i) for i in sys.argv[1:]] or [10, 100, 1000, 10000, 100000]
+	
+	robust = getattr(robust_topological_sort, '__wrapped__', robust_topological_sort)
+	unchecked = getattr(strongly_connected_components, '__wrapped__', strongly_connected_components)
+	
+	def compact(graph):
+		return robust(graph, compact=True)
+	
+	for shape in (chain, sparse, cycle):
+		for count in counts:
+			graph = shape(count)
+			label = f"{shape.__name__} {count:>6}"
+			measure(f"{label}: recursive", recursive, graph)
+			measure(f"{label}: iterative", strongly_connected_components, graph)
+			measure(f"{label}: iterative, unchecked", unchecked, graph)
+			measure(f"{label}: robust topological sort", robust_topological_sort, graph)
+			measure(f"{label}:   mapping", robust, graph)
+			measure(f"{label}:   compact", compact, graph)
+			peak(f"{label}:   mapping", robust, graph)
+			peak(f"{label}:   compact", compact, graph)
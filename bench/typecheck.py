@@ -0,0 +1,73 @@
+"""Quantify the per-call cost of runtime type checking for each public function of this package.
+
+Each function is measured in two child processes, one with checking enabled, and one running in production mode,
+with the `MARROW_PACKAGE_UNCHECKED` environment variable set. Functions calling others (such as `load` calling
+`traverse`) thus benefit throughout. Run from the project root:
+
+	python bench/typecheck.py
+"""
+
+import os
+import subprocess
+import sys
+
+from json import dumps, loads
+from timeit import repeat
+
+from marrow.package.cache import PluginCache
+from marrow.package.disport import Importer
+from marrow.package.lazy import lazy, lazyload
+from marrow.package.loader import compile, compile_reference, load, traverse
+from marrow.package.tarjan import robust_topological_sort, strongly_connected_components, topological_sort
+
+
+class Node:
+	def __init__(self, depth=0):
+		self.child = Node(depth + 1) if depth < 2 else None
+
+
+ROOT = Node()
+GRAPH = {i: [i + 1, (i + 3) % 20] for i in range(19)}
+GRAPH[19] = []
+IMPORTER = Importer([('marrow.package.', 'marrow.package.')], separators=('.', ':', '/'))
+REDIRECTING = Importer()
+REFERENCE = 'marrow.package.loader:traverse'
+
+CASES = {
+		'load': lambda: load(REFERENCE),
+		'traverse': lambda: traverse(ROOT, 'child.child'),
+		'compile': lambda: compile('child.child'),
+		'compile_reference': lambda: compile_reference(REFERENCE),
+		'lazyload': lambda: lazyload(REFERENCE),
+		'lazy.__init__': lambda: lazy(len),
+		'Importer.__call__': lambda: IMPORTER(REFERENCE),
+		'Importer.redirect': lambda: REDIRECTING.redirect('foo', 'bar'),
+		'PluginCache.__init__': lambda: PluginCache('marrow.package.sample'),
+		'strongly_connected_components': lambda: strongly_connected_components(GRAPH),
+		'topological_sort': lambda: topological_sort(GRAPH),
+		'robust_topological_sort': lambda: robust_topological_sort(GRAPH),
+	}
+
+
+def measure(stmt, number=2000):
+	return min(repeat(stmt, number=number, repeat=5)) / number
+
+
+def child(unchecked):
+	env = dict(os.environ, MARROW_PACKAGE_UNCHECKED='1' if unchecked else '0')
+	output = subprocess.check_output([sys.executable, __file__, '--child'], env=env, universal_newlines=True)
+	return loads(output)
+
+
+if __name__ == '__main__':
+	if sys.argv[1:] == ['--child']:
+		print(dumps({label: measure(stmt) for label, stmt in CASES.items()}))
+		sys.exit(0)
+	
+	checked, unchecked = child(False), child(True)
+	
+	print(f"{'':<32} {'checked':>13} {'unchecked':>13} {'overhead':>9}")
+	
+	for label in CASES:
+		before, after = checked[label], unchecked[label]
+		print(f"{label:<32} {before * 1e6:10.3f} µs {after * 1e6:10.3f} µs {before / after:8.1f}×")
@@ -1,28 +1,88 @@
-from collections import defaultdict
-from typeguard import typechecked
+import sys
 
-from .loader import load
+from collections import OrderedDict, defaultdict, namedtuple
+from functools import partial
+from threading import Lock, RLock
+from time import monotonic
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+from weakref import ref
+
+from .index import entry_points
+from .loader import load, nodefault
+from .typecheck import typechecked
+
+
+missing = object()  # Marker for absent entries, and cached failures to resolve a reference.
 
 
 class PluginCache(defaultdict):
 	"""Lazily load plugins from the given namespace.
 	
 	Supports read-only dictionary-like and attribute access.
+	
+	Each plugin is loaded at most once, even if first accessed from several threads at once; those threads wait for
+	the first to complete. Threads accessing different plugins do not wait on each other. A plugin name not found
+	within the namespace is remembered as such for `ttl` seconds, during which further attempts to access it raise
+	`LookupError` without searching again; a `ttl` of zero disables this. Use `refresh` to discard what has been
+	loaded or found missing, such as after installing additional plugins.
+	
+	Loaded plugins are retained indefinitely. To limit this, pass `maxsize` to retain only that many of the most
+	recently used, or `weak` to retain plugins only while referenced elsewhere, or both; see `BoundedPluginCache`.
 	"""
 	
+	def __new__(cls, namespace:str, ttl:float=60.0, maxsize:Optional[int]=None, weak:bool=False):
+		if cls is PluginCache and (maxsize is not None or weak):
+			cls = BoundedPluginCache  # Leaving the unbounded cache to serve loaded plugins as an ordinary dictionary.
+		
+		return super().__new__(cls)
+	
 	@typechecked
-	def __init__(self,  namespace: str):
+	def __init__(self,  namespace: str, ttl: float=60.0, maxsize: Optional[int]=None, weak: bool=False):
 		"""You must specify an entry point namespace."""
 		
+		if maxsize is not None and maxsize < 1:
+			raise ValueError("The cache must be able to hold at least one entry.")
+		
 		super().__init__()
 		
 		self.namespace =  namespace
+		self.ttl = ttl
+		self.maxsize = maxsize
+		self.weak = weak
+		self._locks: Dict[str, Lock] = {}  # Keyed by the names of plugins being loaded.
+		self._missing: Dict[str, Tuple[float, LookupError]] = {}  # The expiry time and error of names not found.
 	
 	def __missing__(self,  key):
 		"""If not already loaded, attempt to load the reference."""
 		
-		self[key] = load(key, self.namespace)
-		return self[key]
+		self._recall(key)
+		
+		lock = self._locks.setdefault(key, Lock())
+		
+		try:
+			with lock:
+				value = self._cached(key)
+				
+				if value is not missing:  # Loaded by another thread while this one waited.
+					return value
+				
+				self._recall(key)
+				
+				try:
+					value = load(key, self.namespace)
+				except LookupError as error:
+					if self.ttl > 0:
+						self._missing[key] = (monotonic() + self.ttl, error)
+					
+					raise
+				
+				self[key] = value
+		
+		finally:
+			if self._locks.get(key) is lock:
+				self._locks.pop(key, None)
+		
+		return value
 	
 	def __getattr__(self, name):
 		"""Proxy attribute access through to the dictionary."""
@@ -33,3 +93,337 @@ class PluginCache(defaultdict):
 			pass
 		
 		raise AttributeError()
+	
+	def refresh(self, name:Optional[str]=None) -> None:
+		"""Discard all loaded plugins, or only the one given, and any record of plugins not found.
+		
+		The shared index of installed entry points is also invalidated, to find plugins installed since it was built.
+		"""
+		
+		if name is None:
+			self.clear()
+			self._missing.clear()
+		
+		else:
+			self.pop(name, None)
+			self._missing.pop(name, None)
+		
+		entry_points.invalidate()
+	
+	def _cached(self, key):
+		"""Retrieve the plugin loaded under the given name, or the `missing` marker."""
+		
+		return dict.get(self, key, missing)
+	
+	def _recall(self, key) -> None:
+		"""Raise the error recorded for a plugin name recently not found, if any."""
+		
+		record = self._missing.get(key)
+		
+		if record is None:
+			return
+		
+		if record[0] > monotonic():
+			error = record[1]
+			raise error.__class__(*error.args)
+		
+		if self._missing.get(key) is record:
+			self._missing.pop(key, None)
+
+
+class BoundedPluginCache(PluginCache):
+	"""A PluginCache limiting the plugins it retains, reporting statistics on their eviction.
+	
+	Given a `maxsize`, only that many of the most recently used plugins are retained, the least recently used being
+	evicted to make room. If `weak`, plugins are otherwise referenced only weakly, so that any no longer in use
+	elsewhere may be collected; an evicted plugin which remains in use is then still found without loading it again.
+	Plugins which can not be weakly referenced are retained as though `weak` were not given.
+	
+	Construct by passing either to `PluginCache`. Item and attribute access behave as they do for any PluginCache, as
+	do the other dictionary methods, other than `copy`, which returns a plain dictionary of the plugins retained.
+	"""
+	
+	def __init__(self, namespace:str, ttl:float=60.0, maxsize:Optional[int]=None, weak:bool=False):
+		super().__init__(namespace, ttl, maxsize, weak)
+		
+		self.hits = self.misses = self.evictions = self.collected = 0
+		self._lock = RLock()  # Re-entrant, as weak reference callbacks may be triggered while it is held.
+		self._recent: 'OrderedDict[str, Any]' = OrderedDict()  # Strongly retained, least recently used first.
+		self._weak: Dict[str, ref] = {}
+	
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + repr(self.namespace) + ", maxsize=" + repr(self.maxsize) + \
+				", weak=" + repr(self.weak) + ")"
+	
+	def __getitem__(self, key):
+		value = self._cached(key)
+		
+		with self._lock:
+			if value is missing:
+				self.misses += 1
+			else:
+				self.hits += 1
+				return value
+		
+		return self.__missing__(key)
+	
+	def __setitem__(self, key, value):
+		with self._lock:
+			if self.weak:
+				try:
+					self._weak[key] = ref(value, partial(self._collected, key))
+				except TypeError:  # Retained strongly, as though not weak; a reference to any earlier value is stale.
+					self._weak.pop(key, None)
+				else:
+					if self.maxsize is None:  # Only weakly referenced, superseding any earlier value retained strongly.
+						self._recent.pop(key, None)
+						return
+			
+			self._retain(key, value)
+	
+	def __contains__(self, key):
+		return self.get(key, missing) is not missing
+	
+	def __len__(self):
+		return len(self.keys())
+	
+	def __iter__(self):
+		return iter(self.keys())
+	
+	def get(self, key, default=None):
+		"""Retrieve an already loaded plugin, without loading it if not."""
+		
+		with self._lock:
+			value = self._recent.get(key, missing)
+			
+			if value is missing:
+				reference = self._weak.get(key)
+				value = missing if reference is None else reference()
+			
+			return default if value is missing or value is None else value
+	
+	def keys(self):
+		with self._lock:
+			weak = [key for key, reference in list(self._weak.items()) if reference() is not None]
+			return list(self._recent) + [key for key in weak if key not in self._recent]
+	
+	def values(self):
+		return [value for key, value in self.items()]
+	
+	def items(self):
+		return [(key, value) for key, value in ((key, self.get(key, missing)) for key in self.keys()) \
+				if value is not missing]
+	
+	def pop(self, key, default=nodefault):
+		with self._lock:
+			value = self.get(key, missing)
+			self._recent.pop(key, None)
+			self._weak.pop(key, None)
+		
+		if value is missing:
+			if default is nodefault:
+				raise KeyError(key)
+			
+			return default
+		
+		return value
+	
+	def clear(self):
+		with self._lock:
+			self._recent.clear()
+			self._weak.clear()
+	
+	def __delitem__(self, key):
+		self.pop(key)
+	
+	def __reversed__(self):
+		return reversed(self.keys())
+	
+	def __eq__(self, other):
+		if isinstance(other, BoundedPluginCache):
+			other = other.copy()
+		
+		return self.copy() == other
+	
+	def __ne__(self, other):
+		return not self == other
+	
+	def __or__(self, other):
+		return self.copy() | other
+	
+	def __ior__(self, other):
+		self.update(other)
+		return self
+	
+	def update(self, *args, **kw):
+		for key, value in dict(*args, **kw).items():
+			self[key] = value
+	
+	def setdefault(self, key, default=None):
+		with self._lock:
+			value = self.get(key, missing)
+			
+			if value is missing:
+				self[key] = value = default
+			
+			return value
+	
+	def popitem(self):
+		with self._lock:
+			keys = self.keys()
+			
+			if not keys:
+				raise KeyError("popitem(): dictionary is empty")
+			
+			key = next(reversed(self._recent)) if self._recent else keys[-1]  # Preferring those retained strongly.
+			return key, self.pop(key)
+	
+	def copy(self):
+		return dict(self.items())
+	
+	def info(self) -> 'PluginCacheInfo':
+		"""Report cache statistics, including the number of plugins evicted, and collected once no longer in use."""
+		
+		with self._lock:
+			return PluginCacheInfo(self.hits, self.misses, self.evictions, self.collected, self.maxsize, len(self))
+	
+	def _cached(self, key):
+		with self._lock:
+			value = self._recent.get(key, missing)
+			
+			if value is not missing:
+				self._recent.move_to_end(key)
+				return value
+			
+			reference = self._weak.get(key)
+			value = None if reference is None else reference()
+			
+			if value is None:
+				return missing
+			
+			if self.maxsize is not None:  # Evicted, but still in use elsewhere; retain it once again.
+				self._retain(key, value)
+			
+			return value
+	
+	def _retain(self, key, value) -> None:
+		recent = self._recent
+		recent[key] = value
+		recent.move_to_end(key)
+		
+		while self.maxsize is not None and len(recent) > self.maxsize:
+			recent.popitem(last=False)
+			self.evictions += 1
+	
+	def _collected(self, key, reference:ref) -> None:
+		with self._lock:
+			if self._weak.get(key) is reference:
+				del self._weak[key]
+				self.collected += 1
+
+
+class CacheInfo(namedtuple('CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))):
+	hits:int
+	misses:int
+	maxsize:int
+	currsize:int
+
+
+class PluginCacheInfo(namedtuple('PluginCacheInfo', ('hits', 'misses', 'evictions', 'collected', 'maxsize',
+		'currsize'))):
+	hits:int
+	misses:int
+	evictions:int
+	collected:int
+	maxsize:Optional[int]
+	currsize:int
+
+
+class CachingLoader:
+	"""A memoizing equivalent to `load`, retaining a bounded number of the most recently used resolutions.
+	
+	Call instances exactly as you would `load`. Results are cached keyed on the reference and the options governing
+	its resolution (other than `default`); references which failed to resolve, where a default was given, are cached
+	as such, and will return whichever default is given on subsequent calls.
+	
+	A cached resolution is discarded, and the reference resolved again, if the module it came from has since been
+	removed from or replaced within `sys.modules`, or reloaded using `importlib.reload`. Otherwise, call `invalidate`.
+	"""
+	
+	__slots__ = ('maxsize', 'hits', 'misses', '_cache', '_lock')
+	
+	maxsize: int
+	hits: int
+	misses: int
+	_cache: 'OrderedDict[Hashable, Tuple]'  # Each value is a (result, module name, module, module spec) tuple.
+	_lock: Lock
+	
+	@typechecked
+	def __init__(self, maxsize:int=1024):
+		if maxsize < 1:
+			raise ValueError("The cache must be able to hold at least one entry.")
+		
+		self.maxsize = maxsize
+		self.hits = self.misses = 0
+		self._cache = OrderedDict()
+		self._lock = Lock()
+	
+	def __repr__(self):
+		return self.__class__.__name__ + "(maxsize=" + str(self.maxsize) + ")"
+	
+	def __len__(self):
+		return len(self._cache)
+	
+	def __call__(self, target:str, namespace:Optional[str]=None, default=nodefault, executable:bool=False,
+			separators:Sequence[str]=('.', ':', '/'), protect:bool=True):
+		key = (target, namespace, executable, tuple(separators), protect)
+		
+		with self._lock:
+			record = self._cache.get(key)
+			
+			if record is not None:
+				result, name, module, spec = record
+				
+				if sys.modules.get(name) is module and (module is None or module.__spec__ is spec) and \
+						(result is not missing or default is not nodefault):
+					self._cache.move_to_end(key)
+					self.hits += 1
+					
+					return default if result is missing else result
+				
+				del self._cache[key]  # Stale, or a prior miss now needing to raise.
+			
+			self.misses += 1
+		
+		result = load(target, namespace, nodefault if default is nodefault else missing, executable, separators, protect)
+		
+		if namespace and separators[1] not in target:
+			name = entry_points.lookup(namespace, target).module
+		else:
+			name = target.partition(separators[2] if separators[2] in target else separators[1])[0]
+		
+		module = sys.modules.get(name)
+		
+		with self._lock:
+			self._cache[key] = (result, name, module, module.__spec__ if module is not None else None)
+			
+			while len(self._cache) > self.maxsize:
+				self._cache.popitem(last=False)
+		
+		return default if result is missing else result
+	
+	def info(self) -> CacheInfo:
+		"""Report cache statistics, in the style of `functools.lru_cache`."""
+		
+		return CacheInfo(self.hits, self.misses, self.maxsize, len(self._cache))
+	
+	def invalidate(self, target:Optional[str]=None) -> None:
+		"""Discard all cached resolutions, or only those for the given reference."""
+		
+		with self._lock:
+			if target is None:
+				self._cache.clear()
+				return
+			
+			for key in [key for key in self._cache if key[0] == target]:
+				del self._cache[key]
@@ -1,6 +1,11 @@
-from inspect import getmodule, isroutine
-from pkg_resources import iter_entry_points
+from inspect import getmodule, ismethod, isroutine
 from typing import Optional
+from weakref import WeakKeyDictionary
+
+from .index import entry_points
+
+
+_names: 'WeakKeyDictionary[object, str]' = WeakKeyDictionary()  # Memoized canonical references.
 
 
 def name(obj, namespace:Optional[str]=None, direct:bool=False) -> str:
@@ -8,26 +13,37 @@ def name(obj, namespace:Optional[str]=None, direct:bool=False) -> str:
 	
 	If the name of a namespace is provided, the name of the plugin registration for the target object is returned. If
 	a plugin can not be identified for the target object a LookupError will be raised, unless "direct" is truthy.
+	
+	The path resolved for any object which can be weakly referenced is remembered for as long as the object lives.
 	"""
 	
 	if not isroutine(obj) and not hasattr(obj, '__name__') and hasattr(obj, '__class__'):
 		obj = obj.__class__
 	
-	module = getmodule(obj)
+	key = obj.__func__ if ismethod(obj) else obj  # Bound methods are ephemeral; the function they wrap is not.
 	
-	if module is None:
-		raise LookupError("Unable to identify module for: " + repr(obj))
+	try:
+		name = _names[key]
 	
-	name = module.__name__ + ':' + obj.__qualname__
+	except (KeyError, TypeError):
+		module = getmodule(obj)
+		
+		if module is None:
+			raise LookupError("Unable to identify module for: " + repr(obj))
+		
+		name = module.__name__ + ':' + obj.__qualname__
+		
+		try:
+			_names[key] = name
+		except TypeError:  # Not hashable, or not weakly referenceable.
+			pass
 	
 	if namespace:
-		eps = list(iter_entry_points(namespace))
-		for ep in eps:
-			candidate = ep.module_name + ':' + ep.attrs[0]
-			if candidate == name:
-				name = ep.name
-				break
-		else:
-			if not direct: raise LookupError("Plugin not found for object: " + name)
+		plugin = entry_points.reverse(namespace).get(name)
+		
+		if plugin is not None:
+			return plugin
+		
+		if not direct: raise LookupError("Plugin not found for object: " + name)
 	
 	return name
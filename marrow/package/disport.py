@@ -3,11 +3,56 @@
 Disport; noun: diversion from work or serious matters; recreation or amusement.
 """
 
+import re
+import sys
+
 from collections import deque
-from typeguard import typechecked
-from typing import Deque, Sequence, Iterable, Optional
+from importlib import import_module
+from importlib.abc import Loader
+from importlib.machinery import ModuleSpec
+from importlib.util import find_spec
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .index import entry_points
+from .loader import Reference, nodefault
+from .typecheck import typechecked
+
+
+missing = object()
+
+
+class Node:
+	"""A node of the trie of redirected prefixes, reached by following the segments and separators of a prefix."""
+	
+	__slots__ = ('children', 'destinations')
+	
+	children: Dict[str, 'Node']
+	destinations: List[str]
+	
+	def __init__(self):
+		self.children = {}
+		self.destinations = []  # In order of registration; later destinations take precedence.
 
-from .loader import load, nodefault
+
+class Alias(Loader):
+	"""An import loader which, rather than executing a module, substitutes an existing one, importing it if needed."""
+	
+	__slots__ = ('target', )
+	
+	target: str
+	
+	def __init__(self, target:str):
+		self.target = target
+	
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + repr(self.target) + ")"
+	
+	def create_module(self, spec):
+		return None  # Use the default; it serves as a placeholder replaced below.
+	
+	def exec_module(self, module):
+		# The import system returns whatever occupies sys.modules under the imported name once this returns.
+		sys.modules[module.__name__] = import_module(self.target)
 
 
 class Importer:
@@ -16,26 +61,39 @@ class Importer:
 	Predominantly useful when paired with a template importer such as web.template or import-based template engine
 	like cinje to allow for overriding of page components.
 	
-	Later overrides take precedence over earlier ones, and are evaluated using a prefix search to construct a list of
+	Overrides are matched against whole segments of the target, so that an override of `theme.page` applies to
+	`theme.page`, `theme.page.header`, and `theme.page:render`, but not `theme.pages`. The longest matching prefix takes
+	precedence, and later overrides take precedence over earlier ones of the same prefix, to construct a list of
 	candidate import paths. Each is attempted until one succeeds, or none succeed, at which point the original import
 	is attempted.
 	
+	The reference found for each target is cached, as are candidates which failed to import, so that repeated imports
+	of the same target perform no search. Registering an override invalidates only the cached targets it applies to;
+	call `invalidate` to discard everything cached, such as after altering `sys.path`.
+	
+	Once installed, using `install`, overrides also apply to ordinary `import` statements, and to anything else using
+	the import system. Importing an overridden module name then provides the module it is redirected to, cached in
+	`sys.modules` under both names. Only overrides of modules, not objects within them, apply to such imports, and any
+	parent package of an overridden module name must still be importable, or itself be overridden.
+	
 	Plugin names can be overridden as well, however, the destination should still be a module path. The object name
 	referenced by the original entry_point will be attempted against the overridden path, with similar fallback to the
-	original.
+	original. Entry points are found using the shared index of installed entry points; call `invalidate` after
+	altering the environment in ways the index would not notice.
 	"""
 	
-	__slots__ = ('redirects', 'namespace', 'separators', 'executable', 'protect')
+	__slots__ = ('redirects', 'namespace', 'separators', 'executable', 'protect', '_root', '_pattern', '_resolved',
+			'_failed', '_modules', '_importing')
 	
 	redirects: Deque[str]
 	namespace: str
-	separators: Iterable[str]
+	separators: Sequence[str]
 	executable: bool
 	protect: bool
 	
 	@typechecked
 	def __init__(self, redirect:Optional[Iterable[str]]=None, namespace:str=None,
-				separators:Iterable[str]=('.', ':'), executable:bool=False, protect:bool=True):
+				separators:Sequence[str]=('.', ':', '/'), executable:bool=False, protect:bool=True):
 		"""Configure the disport Importer.
 		
 		The arguments are essentially the same as those for the load or lazyload utilities, with the addition of the
@@ -51,6 +109,13 @@ class Importer:
 		self.executable = executable
 		self.protect = protect
 		
+		self._root = Node()
+		self._pattern = re.compile('(' + '|'.join(re.escape(separator) for separator in separators[:2]) + ')')
+		self._resolved: Dict[str, Reference] = {}  # The reference found for each target.
+		self._failed: Set[str] = set()  # Candidate references which could not be imported.
+		self._modules: Dict[str, Optional[str]] = {}  # The module found for each overridden module name, if any.
+		self._importing: Set[str] = set()  # Module names being located, to prevent cyclic redirection.
+		
 		# Initial redirects processing.
 		if redirect:
 			for source, destination in redirect:
@@ -58,36 +123,185 @@ class Importer:
 	
 	@typechecked
 	def redirect(self, source:str, destination:str):
+		"""Redirect imports of the source, and any target within it, to the destination."""
+		
 		self.redirects.appendleft((source, destination))
+		
+		segments = self._split(source)
+		node = self._root
+		
+		for segment in segments:
+			child = node.children.get(segment)
+			
+			if child is None:
+				child = node.children[segment] = Node()
+			
+			node = child
+		
+		node.destinations.append(destination)
+		
+		for cache in (self._resolved, self._modules):
+			for target in [target for target in cache if self._split(target)[:len(segments)] == segments]:
+				del cache[target]
+	
+	def invalidate(self) -> None:
+		"""Discard all cached references, including the record of candidates which could not be imported."""
+		
+		self._resolved.clear()
+		self._failed.clear()
+		self._modules.clear()
+	
+	def install(self) -> 'Importer':
+		"""Apply overrides of modules to all imports, by installing this Importer as a `sys.meta_path` finder."""
+		
+		if self not in sys.meta_path:
+			sys.meta_path.insert(0, self)
+		
+		return self
+	
+	def uninstall(self) -> None:
+		"""Remove this Importer from `sys.meta_path`; modules already imported through it remain in `sys.modules`."""
+		
+		while self in sys.meta_path:
+			sys.meta_path.remove(self)
+	
+	def find_spec(self, fullname:str, path=None, target=None) -> Optional[ModuleSpec]:
+		"""Locate the module an overridden module name is redirected to, per the `sys.meta_path` finder protocol."""
+		
+		try:
+			module = self._modules[fullname]
+		except KeyError:
+			module = self._locate(fullname)
+		
+		return None if module is None else ModuleSpec(fullname, Alias(module))
+	
+	def invalidate_caches(self) -> None:
+		"""Called by `importlib.invalidate_caches`; equivalent to `invalidate`."""
+		
+		self.invalidate()
+	
+	@typechecked
+	def candidates(self, target:str) -> List[str]:
+		"""The redirected references to attempt for the given target, in order of precedence."""
+		
+		return self._candidates(target)
 	
 	@typechecked
 	def __call__(self, target:str, default=nodefault):
-		for candidate, destination in self.redirects:
-			if candidate == target:  # Plugin reference.
-				pass
-				return
-			
-			if not target.startswith(candidate):
+		reference = self._resolved.get(target)
+		
+		if reference is not None:
+			return reference(default)
+		
+		if self.namespace and self.separators[1] not in target:  # A plugin name, as interpreted by load().
+			candidates, original, namespace = self._plugin(target)
+		else:
+			candidates, original, namespace = self._candidates(target), target, None
+		
+		for candidate in candidates:
+			if candidate in self._failed:
 				continue
 			
-			# Prefix match found, attempt import.
-			candidate = load(
-					target.replace(candidate, destination, 1),
-					namespace = self.namespace,
-					default = None,
-					executable = self.executable,
-					separators = self.separators,
-					protect = self.protect
-				)
+			# Redirect found, attempt import.
+			reference = self._reference(candidate)
+			obj = reference(missing)
 			
-			if candidate is not None:
-				return candidate
+			if obj is missing:
+				self._failed.add(candidate)
+				continue
+			
+			self._resolved[target] = reference
+			return obj
 		
 		# Fall back on direct use.
-		return load(
-				target.replace(candidate, destination),
-				namespace = self.namespace,
-				default = default,
+		reference = self._reference(original, namespace)
+		obj = reference(missing)
+		
+		if obj is missing:
+			return reference(default)
+		
+		self._resolved[target] = reference
+		return obj
+	
+	def _plugin(self, name:str) -> Tuple[List[str], str, Optional[str]]:
+		"""The redirected references to attempt for a plugin name, then the reference and namespace to fall back on."""
+		
+		entry = entry_points[self.namespace].get(name)
+		
+		if entry is None:  # Unknown; loading the name as given will report this.
+			return [], name, self.namespace
+		
+		dot, colon = self.separators[:2]
+		attr = entry.attr and entry.attr.replace('.', dot)  # Entry points are always written in dot-colon notation.
+		original = (entry.module + colon + attr) if attr else entry.module
+		node = self._root
+		
+		for segment in self._split(name):  # Only a redirect of the whole plugin name applies.
+			node = node.children.get(segment)
+			
+			if node is None:
+				return [], original, None
+		
+		return [(destination + colon + attr) if attr else destination for destination in reversed(node.destinations)], \
+				original, None
+	
+	def _locate(self, fullname:str) -> Optional[str]:
+		candidates = [candidate for candidate in self._candidates(fullname) if self.separators[1] not in candidate]
+		
+		if not candidates or fullname in self._importing:
+			return None  # Not overridden, so not cached; or a redirect leads back here, so decline to the original.
+		
+		self._importing.add(fullname)
+		
+		try:
+			for candidate in candidates:
+				if candidate in self._failed:
+					continue
+				
+				try:
+					if find_spec(candidate) is not None:
+						self._modules[fullname] = candidate
+						return candidate
+				
+				except (ImportError, ValueError):  # A parent package is missing, or an existing module lacks a spec.
+					pass
+				
+				self._failed.add(candidate)
+		
+		finally:
+			self._importing.discard(fullname)
+		
+		self._modules[fullname] = None
+		return None
+	
+	def _candidates(self, target:str) -> List[str]:
+		# Unchecked, as the finder consults it upon every import performed by the process.
+		
+		node = self._root
+		length = 0
+		matches = [(0, node)] if node.destinations else []
+		
+		for segment in self._split(target):
+			node = node.children.get(segment)
+			
+			if node is None:
+				break
+			
+			length += len(segment)
+			
+			if node.destinations:
+				matches.append((length, node))
+		
+		return [destination + target[length:] for length, node in reversed(matches) \
+				for destination in reversed(node.destinations)]
+	
+	def _split(self, reference:str) -> List[str]:
+		return [segment for segment in self._pattern.split(reference) if segment]
+	
+	def _reference(self, target:str, namespace:Optional[str]=None) -> Reference:
+		return Reference(
+				target,
+				namespace = namespace,
 				executable = self.executable,
 				separators = self.separators,
 				protect = self.protect
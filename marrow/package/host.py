@@ -1,85 +1,398 @@
 import os
-import pkg_resources
+import sys
 
-from typeguard import typechecked
-from typing import Any, Dict, Iterable, List, Set, cast
-from pkg_resources import Distribution
+from collections import OrderedDict, namedtuple
+from threading import RLock
+from time import perf_counter
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, cast
 from logging import getLogger as _logger
 
 from .canonical import name as _name
 from .cache import PluginCache
-from .loader import traverse
-from .tarjan import robust_topological_sort
+from .index import entry_points
+from .loader import compile, traverse
+from .tarjan import robust_topological_sort, topological_layers
+from .typecheck import typechecked
 
 
 log = _logger(__name__)
 Plugin = Any
 Flags = Set[str]
 
+_flags = tuple(compile(attribute, ()) for attribute in ('provides', 'needs', 'uses', 'excludes'))
+_first = compile('first', False)
+_last = compile('last', False)
+
+
+class Metadata(namedtuple('Metadata', ('provides', 'needs', 'uses', 'excludes', 'first', 'last'))):
+	"""The dependency metadata declared by an extension, read once."""
+	
+	__slots__ = ()
+	
+	provides: FrozenSet[str]
+	needs: FrozenSet[str]
+	uses: FrozenSet[str]
+	excludes: FrozenSet[str]
+	first: bool
+	last: bool  # An extension declaring both `first` and `last` is only considered first.
+	
+	@classmethod
+	def of(cls, ext:Plugin) -> 'Metadata':
+		provides, needs, uses, excludes = (frozenset(flags(ext)) for flags in _flags)
+		first = bool(_first(ext))
+		
+		return cls(provides, needs, uses, excludes, first, not first and bool(_last(ext)))
+
+
+class Barrier:
+	"""A placeholder node in an extension graph, standing between the `first` or `last` extensions and all others."""
+	
+	__slots__ = ('name', )
+	
+	def __init__(self, name:str):
+		self.name = name
+	
+	def __repr__(self):
+		return "<" + self.name + ">"
+
+
+FIRST = Barrier('first')
+LAST = Barrier('last')
+
+
+def _without_barriers(nodes:Iterable[Any]) -> tuple:
+	return tuple(node for node in nodes if node.__class__ is not Barrier)
+
+
+class Deferred:
+	"""A lightweight handle standing in for a registered plugin which has not yet been imported."""
+	
+	__slots__ = ('name', 'entry')
+	
+	def __init__(self, name:str, entry):
+		self.name = name
+		self.entry = entry
+	
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + repr(self.name) + ", " + repr(self.entry.value) + ")"
+
+
+missing = object()  # Marker for deferred plugins which failed to import.
+
+
+class DispatchPlan:
+	"""Precompiled per-hook callbacks of an ordered set of extensions.
+	
+	Indexing a plan by hook name produces a tuple of the callbacks each extension provides for that hook, in order,
+	omitting extensions lacking the hook. Tuples are resolved once per hook, on first request, then reused; attributes
+	assigned to an extension afterwards are not noticed. Plans are obtained from `ExtensionManager.plan()`.
+	"""
+	
+	__slots__ = ('extensions', '_forward', '_reverse')
+	
+	extensions: Tuple[Plugin, ...]
+	_forward: Dict[str, Tuple[Callable, ...]]
+	_reverse: Dict[str, Tuple[Callable, ...]]
+	
+	def __init__(self, extensions:Iterable[Plugin], hooks:Iterable[str]=()):
+		self.extensions = tuple(extensions)
+		self._forward = {}
+		self._reverse = {}
+		
+		for hook in hooks:
+			self[hook]
+	
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + repr(list(self.extensions)) + ")"
+	
+	def __getitem__(self, hook:str) -> Tuple[Callable, ...]:
+		"""Retrieve the callbacks for the named hook, in dependency order."""
+		
+		try:
+			return self._forward[hook]
+		except KeyError:
+			pass
+		
+		callbacks = tuple(callback for callback in (getattr(ext, hook, None) for ext in self.extensions) \
+				if callback is not None)
+		self._forward[hook] = callbacks
+		
+		return callbacks
+	
+	def reverse(self, hook:str) -> Tuple[Callable, ...]:
+		"""Retrieve the callbacks for the named hook, in reverse dependency order."""
+		
+		try:
+			return self._reverse[hook]
+		except KeyError:
+			pass
+		
+		callbacks = self._reverse[hook] = self[hook][::-1]
+		
+		return callbacks
+	
+	def __call__(self, hook:str, *args, **kw) -> None:
+		"""Invoke the callbacks for the named hook in dependency order, discarding any values returned."""
+		
+		for callback in self[hook]:
+			callback(*args, **kw)
+	
+	def call_reverse(self, hook:str, *args, **kw) -> None:
+		"""Invoke the callbacks for the named hook in reverse dependency order, discarding any values returned."""
+		
+		for callback in self.reverse(hook):
+			callback(*args, **kw)
+	
+	def collect(self, hook:str, *args, **kw) -> List[Any]:
+		"""Invoke the callbacks for the named hook in dependency order, returning a list of the values returned."""
+		
+		return [callback(*args, **kw) for callback in self[hook]]
+	
+	def collect_reverse(self, hook:str, *args, **kw) -> List[Any]:
+		"""Invoke the callbacks for the named hook in reverse dependency order, returning a list of the values returned."""
+		
+		return [callback(*args, **kw) for callback in self.reverse(hook)]
+
 
 class PluginManager:
+	"""Discover and register the plugins advertised within an entry point namespace.
+	
+	By default every plugin is imported when the manager is constructed. If `lazy` is truthy, plugins are instead
+	imported upon first access by name or through iteration; call `preload()` to import all of them at once, e.g.
+	prior to forking worker processes.
+	
+	Plugins advertised by distributions activated later are registered by calling `rescan()`. If `pkg_resources` has
+	already been imported when the manager is constructed, its working set is available as `ws`, and the manager
+	subscribes to it, rescanning automatically whenever a distribution is added; otherwise `ws` is None.
+	"""
+	
 	namespace:str
 	folders:Iterable[str]
-	plugins:List[Plugin]
 	named:PluginCache
+	lazy:bool
+	ws:Any
 	
 	__wrapped__ = None  # Python decorator protocol bypass.
 	
 	@typechecked
-	def __init__(self, namespace:str, folders:Iterable[str]=None):
+	def __init__(self, namespace:str, folders:Iterable[str]=None, lazy:bool=False):
 		self.namespace = namespace
 		self.folders = folders if folders else []
-		self.plugins = []
+		self.lazy = lazy
 		self.named = PluginCache(namespace)
-		
-		self.ws = ws = pkg_resources.working_set
+		self._plugins: List[Plugin] = []  # Registered plugins, some possibly still Deferred handles.
+		self._deferred: Dict[str, Deferred] = {}
+		self._pending = 0
+		self._lock = RLock()
+		self._seen: Set[str] = set()  # The names of plugins registered, or found and handled, so far.
 		
 		for container in self.folders:  # pragma: no cover - TODO: Figure out how to test this.
 			path = os.path.abspath(os.path.expanduser(container))
 			log.info("Adding " + path + " to plugin search path.", extra=dict(path=path, namespace=self.namespace))
-			ws.add_entry(path)
-			env = pkg_resources.Environment([path])
-			ws.require(*env)
+			if path not in sys.path: sys.path.append(path)  # The entry point index notices, and rescans.
 		
-		ws.subscribe(self._register)
+		self._scan()
+		
+		# Subscription is only possible if something else has already paid the cost of importing pkg_resources.
+		self.ws = sys.modules['pkg_resources'].working_set if 'pkg_resources' in sys.modules else None
+		
+		if self.ws is not None:
+			self.ws.subscribe(self._activated, existing=False)
 		
 		super(PluginManager, self).__init__()
 	
+	@property
+	def plugins(self) -> List[Plugin]:
+		"""The list of all registered plugins, in registration order, importing any not yet loaded."""
+		
+		if self._pending:
+			try:
+				self.preload()
+			except AttributeError as exc:  # Would otherwise be masked by __getattr__ as a lookup of a plugin "plugins".
+				raise RuntimeError("Unable to import deferred plugins: " + str(exc)) from exc
+		
+		return self._plugins
+	
 	@typechecked
 	def register(self, name:str, plugin:object) -> None:
 		log.info("Registering plugin" + name + " in namespace " + self.namespace + ".",
 				extra = dict(plugin_name=name, namespace=self.namespace, plugin=_name(plugin)))
-		self.named[name] = plugin
-		self.plugins.append(plugin)
+		
+		with self._lock:
+			self._seen.add(name)
+			self._deferred.pop(name, None)  # An explicit registration takes precedence over a pending one.
+			self.named[name] = plugin
+			self._plugins.append(plugin)
+	
+	def rescan(self) -> List[str]:
+		"""Register the plugins advertised within the namespace which have not been seen before, returning their names.
+		
+		The shared index of installed entry points is invalidated first, to find plugins installed since it was built.
+		Plugins are imported, or deferred, as they would have been when the manager was constructed. Names already
+		registered are skipped, as are those which previously failed to import.
+		"""
+		
+		entry_points.invalidate()
+		return self._scan()
+	
+	def _scan(self) -> List[str]:
+		with self._lock:
+			found = [(name, entry) for name, entry in entry_points[self.namespace].items() if name not in self._seen]
+			self._seen.update(name for name, entry in found)
+		
+		for name, entry in found:
+			if self.lazy:
+				self._defer(name, entry)
+			else:
+				self._register(name, entry)
+		
+		return [name for name, entry in found]
+	
+	def preload(self) -> None:
+		"""Import all deferred plugins."""
+		
+		for plugin in self._plugins[:]:
+			if plugin.__class__ is Deferred:
+				self._resolve(plugin)
 	
 	@typechecked
-	def _register(self, dist:Distribution) -> None:
-		entries = dist.get_entry_map(self.namespace)
+	def warm(self, concurrency:int=4) -> Dict[str, float]:
+		"""Import all deferred plugins using a pool of `concurrency` threads, overlapping filesystem latency.
+		
+		Returns a mapping of plugin names to the wall time, in seconds, spent importing each, including those which
+		failed. Failures are logged, and the plugins skipped, as per eager registration.
+		
+		Imports remain subject to the per-module locks of the import system; should concurrent imports of mutually
+		dependent modules deadlock, the affected plugins are retried sequentially once the pool completes.
+		"""
+		
+		if concurrency < 1:
+			raise ValueError("At least one thread is required.")
+		
+		from concurrent.futures import ThreadPoolExecutor  # Only needed here; avoid the import cost otherwise.
 		
-		if not entries:
+		handles = [plugin for plugin in self._plugins if plugin.__class__ is Deferred]
+		timings: Dict[str, float] = {}
+		retry: List[Deferred] = []
+		
+		def resolve(handle:Deferred) -> Optional[float]:
+			began = perf_counter()
+			
+			try:
+				self._resolve(handle)
+			except RuntimeError:  # Includes the import system's _DeadlockError.
+				return None
+			
+			return perf_counter() - began
+		
+		with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='warm-' + self.namespace) as pool:
+			for handle, duration in zip(handles, pool.map(resolve, handles)):
+				if duration is None:
+					retry.append(handle)
+				else:
+					timings[handle.name] = duration
+		
+		for handle in retry:
+			began = perf_counter()
+			self._resolve(handle)
+			timings[handle.name] = perf_counter() - began
+		
+		for name, duration in timings.items():
+			log.debug("Plugin " + name + " in namespace " + self.namespace + " took {:.3f}s to import.".format(duration),
+					extra=dict(plugin_name=name, namespace=self.namespace, duration=duration))
+		
+		return timings
+	
+	def _activated(self, dist) -> None:
+		"""Working set subscription callback, executed when a new distribution is activated."""
+		
+		self.rescan()
+	
+	def _register(self, name:str, entry) -> None:
+		try:
+			plugin = entry.load()
+		
+		except ImportError:
+			log.error("Skipping registration of '{!r}' due to uncaught error on import.".format(entry), exc_info=True)
 			return
 		
+		self.register(name, plugin)
+	
+	def _defer(self, name:str, entry) -> None:
+		handle = Deferred(name, entry)
+		
+		with self._lock:
+			self._deferred[name] = handle
+			self._plugins.append(handle)
+			self._pending += 1
+	
+	def _resolve(self, handle:Deferred, required:bool=False):
+		"""Import a deferred plugin, substituting it for its handle.
+		
+		Import failures are logged, and the plugin discarded, as they would have been upon eager registration. If the
+		plugin is `required` the exception is raised, otherwise the `missing` marker is returned.
+		"""
+		
 		try:
-			for name in entries:
-				plugin = entries[name].load()
-				
-				self.register(name, plugin)
+			plugin = handle.entry.load()  # The import itself is not performed while holding our lock.
+		
+		except ImportError:
+			with self._lock:
+				self._substitute(handle)
+			
+			if required: raise
+			
+			log.error("Skipping registration of '{!r}' due to uncaught error on import.".format(handle.entry),
+					exc_info=True)
+			
+			return missing
+		
+		with self._lock:
+			self._substitute(handle, plugin)
+		
+		return plugin
+	
+	def _substitute(self, handle:Deferred, plugin=missing) -> None:
+		"""Replace (or, if missing, remove) a deferred handle. Must be called while holding the lock."""
+		
+		for i, candidate in enumerate(self._plugins):
+			if candidate is handle:
+				break
+		else:
+			return  # Already resolved by another thread.
+		
+		if plugin is missing:
+			del self._plugins[i]
+		else:
+			self._plugins[i] = plugin
 		
-		except pkg_resources.UnknownExtra:  # pragma: no cover - TODO: Figure out how to test this.
-			log.warning("Skipping registration of '{!r}' due to missing dependencies.".format(dist), exc_info=True)
+		self._pending -= 1
 		
-		except ImportError:  # pragma: no cover - TODO: Figure out how to test this.
-			log.error("Skipping registration of '{!r}' due to uncaught error on import.".format(dist), exc_info=True)
+		if self._deferred.get(handle.name) is handle:
+			del self._deferred[handle.name]
+			
+			if plugin is not missing:
+				self.named[handle.name] = plugin
 	
 	def __iter__(self):
-		for plugin in self.plugins:
+		plugins = self._plugins
+		i = 0
+		
+		while i < len(plugins):
+			plugin = plugins[i]
+			
+			if plugin.__class__ is Deferred:
+				plugin = self._resolve(plugin)
+				continue  # Re-examine this position; the plugin has either been substituted or removed.
+			
 			yield plugin
+			i += 1
 	
 	def __getattr__(self, name:str):
 		if name.startswith('_'): raise AttributeError()
 		
 		try:
-			return self.named[name]
+			return self[name]
 		except IndexError:
 			pass
 		
@@ -87,9 +400,371 @@ class PluginManager:
 	
 	def __getitem__(self, name:str):
 		if name.startswith('_'): raise KeyError()
+		
+		handle = self._deferred.get(name)
+		
+		if handle is not None:
+			return self._resolve(handle, required=True)
+		
 		return self.named[name]
 
 
+class ExtensionGraph:
+	"""An incrementally maintained dependency ordering of a set of extensions.
+	
+	Extensions may be added and removed individually; each change updates the feature index, dependency graph, and
+	ordering locally, rather than re-sorting all extensions, using the dynamic topological ordering algorithm of Pearce
+	and Kelly. The `first` and `last` constraints are represented by two barrier nodes rather than by edges between
+	every pair of extensions involved.
+	
+	A change introducing a circular dependency raises a LookupError, and one introducing a conflict between provided
+	and excluded features raises a RuntimeError; in either case the graph is left unchanged. Needs may remain unmet
+	while extensions are being added, but not when the order is requested.
+	
+	The resulting order satisfies the same constraints as `ExtensionManager.order()`, though where several orders are
+	valid, it may not be the same one. Instances are not thread-safe.
+	"""
+	
+	__slots__ = ('_metadata', '_sequence', '_counter', '_providers', '_consumers', '_needers', '_excluders',
+			'_predecessors', '_successors', '_position', '_next', '_journal', '_ordered')
+	
+	def __init__(self, extensions:Iterable[Plugin]=()):
+		self._metadata: Dict[Plugin, Metadata] = {}
+		self._sequence: Dict[Plugin, int] = {}  # Order of addition; the latest provider of a feature is used.
+		self._counter = 0
+		self._providers: Dict[str, Dict[Plugin, int]] = {}
+		self._consumers: Dict[str, Set[Plugin]] = {}  # Those needing or using each feature.
+		self._needers: Dict[str, Set[Plugin]] = {}
+		self._excluders: Dict[str, List[Plugin]] = {}
+		self._predecessors: Dict[Any, Set[Any]] = {FIRST: set(), LAST: set()}
+		self._successors: Dict[Any, Set[Any]] = {FIRST: set(), LAST: set()}
+		self._position: Dict[Any, int] = {FIRST: 0, LAST: 1}
+		self._next = 2
+		self._journal: Optional[List[Tuple[bool, Any, Any]]] = None
+		self._ordered: Optional[List[Plugin]] = None
+		
+		self._build(extensions)
+	
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + repr(sorted(self._metadata, key=self._position.__getitem__)) + ")"
+	
+	def __len__(self) -> int:
+		return len(self._metadata)
+	
+	def __contains__(self, ext:Plugin) -> bool:
+		return ext in self._metadata
+	
+	def __iter__(self):
+		return iter(self.order())
+	
+	def order(self) -> List[Plugin]:
+		"""Retrieve the extensions in dependency order, from least to most dependent, as a new list."""
+		
+		missing = [feature for feature in self._needers if feature not in self._providers]
+		
+		if missing:
+			raise LookupError("Extensions providing the following features must be configured:\n" + \
+					', '.join(sorted(missing)))
+		
+		if self._ordered is None:
+			self._ordered = sorted(self._metadata, key=self._position.__getitem__)
+		
+		return list(self._ordered)
+	
+	def add(self, ext:Plugin) -> None:
+		"""Add an extension, raising a ValueError if already present."""
+		
+		if ext in self._metadata:
+			raise ValueError("Extension already present: " + repr(ext))
+		
+		metadata = Metadata.of(ext)
+		
+		self._check(ext, metadata)
+		self._register(ext, metadata, self._counter)
+		self._counter += 1
+		self._predecessors[ext] = set()
+		self._successors[ext] = set()
+		self._position[ext] = self._next
+		self._next += 1
+		
+		try:
+			self._transact(self._attach, ext, metadata)
+		
+		except LookupError:
+			self._unregister(ext)
+			self._drop(ext)
+			raise
+	
+	def remove(self, ext:Plugin) -> None:
+		"""Remove an extension, raising a KeyError if not present."""
+		
+		metadata = self._metadata[ext]
+		sequence = self._sequence[ext]
+		self._unregister(ext)
+		
+		try:
+			self._transact(self._detach, ext, metadata)
+		
+		except LookupError:  # Another provider of a feature it provided introduces a cycle.
+			self._register(ext, metadata, sequence)
+			raise
+		
+		self._drop(ext)
+	
+	def _build(self, extensions:Iterable[Plugin]) -> None:
+		"""Add the initial extensions in bulk, checking for cycles once, against the final choice of providers.
+		
+		Adding them individually would check each intermediate state, where a provider later superseded may still be
+		chosen, rejecting some valid sets of extensions.
+		"""
+		
+		added: List[Plugin] = []
+		
+		for ext in extensions:
+			if ext in self._metadata:
+				continue
+			
+			metadata = Metadata.of(ext)
+			self._check(ext, metadata)
+			self._register(ext, metadata, self._counter)
+			self._counter += 1
+			self._predecessors[ext] = set()
+			self._successors[ext] = set()
+			added.append(ext)
+		
+		for ext in added:
+			for before, after in self._barriers(ext, self._metadata[ext]):
+				self._successors[before].add(after)
+				self._predecessors[after].add(before)
+			
+			for provider in self._wanted(ext):
+				self._successors[provider].add(ext)
+				self._predecessors[ext].add(provider)
+		
+		# Positions are assigned by a single topological sort of every node, barriers included.
+		remaining = {node: len(predecessors) for node, predecessors in self._predecessors.items()}
+		ordered = [node for node, count in remaining.items() if not count]
+		
+		for node in ordered:  # Extended during iteration.
+			for successor in self._successors[node]:
+				remaining[successor] -= 1
+				
+				if not remaining[successor]:
+					ordered.append(successor)
+		
+		if len(ordered) < len(remaining):
+			unsorted = set(remaining).difference(ordered)
+			
+			for component in robust_topological_sort({node: self._successors[node] & unsorted for node in unsorted}):
+				if len(component) > 1:
+					raise LookupError("Circular dependency found: " + repr(_without_barriers(component)))
+		
+		self._position = {node: slot for slot, node in enumerate(ordered)}
+		self._next = len(ordered)
+	
+	def _check(self, ext:Plugin, metadata:Metadata) -> None:
+		"""Raise a RuntimeError if the extension conflicts with those already present."""
+		
+		for feature in metadata.provides:
+			if feature in metadata.excludes or self._excluders.get(feature):
+				raise RuntimeError("{!r} precludes use of '{!s}', which is defined by {!r}".format(
+						self._excluders.get(feature) or [ext], feature, ext))
+		
+		for feature in metadata.excludes:
+			if feature in self._providers:
+				raise RuntimeError("{!r} precludes use of '{!s}', which is defined by {!r}".format(
+						[ext], feature, self._provider(feature)))
+	
+	def _transact(self, change, ext:Plugin, metadata:Metadata) -> None:
+		"""Apply a change to the edges of the graph, undoing all edge alterations should it raise a LookupError.
+		
+		Undoing the alterations in reverse passes only through previously visited, thus acyclic, states.
+		"""
+		
+		journal = self._journal = []
+		self._ordered = None
+		
+		try:
+			change(ext, metadata)
+		
+		except LookupError:
+			self._journal = None
+			
+			for linked, before, after in reversed(journal):
+				if linked:
+					self._unlink(before, after)
+				else:
+					self._link(before, after)
+			
+			raise
+		
+		finally:
+			self._journal = None
+	
+	def _attach(self, ext:Plugin, metadata:Metadata) -> None:
+		pending = self._reconcile(self._affected(metadata) | {ext})
+		
+		for before, after in self._barriers(ext, metadata):
+			self._link(before, after)
+		
+		for before, after in pending:
+			self._link(before, after)
+	
+	def _detach(self, ext:Plugin, metadata:Metadata) -> None:
+		for predecessor in list(self._predecessors[ext]):
+			self._unlink(predecessor, ext)
+		
+		for successor in list(self._successors[ext]):
+			self._unlink(ext, successor)
+		
+		for before, after in self._reconcile(self._affected(metadata)):
+			self._link(before, after)
+	
+	def _barriers(self, ext:Plugin, metadata:Metadata) -> Tuple[Tuple[Any, Any], Tuple[Any, Any]]:
+		"""The edges relating an extension to the `FIRST` and `LAST` barriers."""
+		
+		return ((ext, FIRST) if metadata.first else (FIRST, ext)), ((LAST, ext) if metadata.last else (ext, LAST))
+	
+	def _affected(self, metadata:Metadata) -> Set[Plugin]:
+		"""Those extensions whose dependencies may be altered by a change to providers of the given features."""
+		
+		return set().union(*(self._consumers.get(feature, ()) for feature in metadata.provides))
+	
+	def _provider(self, feature:str) -> Optional[Plugin]:
+		providers = self._providers.get(feature)
+		return max(providers, key=providers.__getitem__) if providers else None
+	
+	def _wanted(self, ext:Plugin) -> Set[Plugin]:
+		"""The current providers of the features an extension needs or uses, other than itself."""
+		
+		metadata = self._metadata[ext]
+		wanted = set(self._provider(feature) for feature in metadata.needs | metadata.uses)
+		wanted.discard(None)
+		wanted.discard(ext)
+		
+		return wanted
+	
+	def _reconcile(self, extensions:Iterable[Plugin]) -> List[Tuple[Plugin, Plugin]]:
+		"""Remove the edges from providers the given extensions no longer depend upon, returning the edges to add.
+		
+		Removing every stale edge before adding any ensures the graph only passes through subsets of its final state,
+		so that a cycle is only found if that final state has one.
+		"""
+		
+		pending = []
+		
+		for ext in extensions:
+			wanted = self._wanted(ext)
+			current = self._predecessors[ext].difference((FIRST, LAST))
+			
+			for provider in current - wanted:
+				self._unlink(provider, ext)
+			
+			pending.extend((provider, ext) for provider in wanted - current)
+		
+		return pending
+	
+	def _register(self, ext:Plugin, metadata:Metadata, sequence:int) -> None:
+		self._metadata[ext] = metadata
+		self._sequence[ext] = sequence
+		
+		for feature in metadata.provides:
+			self._providers.setdefault(feature, {})[ext] = sequence
+		
+		for feature in metadata.needs | metadata.uses:
+			self._consumers.setdefault(feature, set()).add(ext)
+		
+		for feature in metadata.needs:
+			self._needers.setdefault(feature, set()).add(ext)
+		
+		for feature in metadata.excludes:
+			self._excluders.setdefault(feature, []).append(ext)
+	
+	def _unregister(self, ext:Plugin) -> None:
+		metadata = self._metadata.pop(ext)
+		del self._sequence[ext]
+		
+		for mapping, features in ((self._providers, metadata.provides), (self._consumers, metadata.needs | metadata.uses),
+				(self._needers, metadata.needs), (self._excluders, metadata.excludes)):
+			for feature in features:
+				members = mapping[feature]
+				
+				if isinstance(members, dict):
+					del members[ext]
+				else:
+					members.remove(ext)
+				
+				if not members:
+					del mapping[feature]
+	
+	def _drop(self, ext:Plugin) -> None:
+		del self._predecessors[ext], self._successors[ext], self._position[ext]
+		self._ordered = None
+	
+	def _link(self, before, after) -> None:
+		"""Add an edge requiring `before` to precede `after`, reordering the affected region only if required."""
+		
+		if before is after or after in self._successors[before]:
+			return
+		
+		if self._position[after] < self._position[before]:
+			self._reorder(before, after)
+		
+		self._successors[before].add(after)
+		self._predecessors[after].add(before)
+		
+		if self._journal is not None:
+			self._journal.append((True, before, after))
+	
+	def _unlink(self, before, after) -> None:
+		self._successors[before].discard(after)
+		self._predecessors[after].discard(before)
+		
+		if self._journal is not None:
+			self._journal.append((False, before, after))
+	
+	def _reorder(self, before, after) -> None:
+		"""Shift the nodes between `after` and `before` such that `before` precedes `after`, or identify a cycle."""
+		
+		position = self._position
+		upper, lower = position[before], position[after]
+		forward: Dict[Any, Any] = {after: None}  # Nodes which must follow `after`, mapped to how they were reached.
+		stack = [after]
+		
+		while stack:
+			node = stack.pop()
+			
+			for successor in self._successors[node]:
+				if successor is before:
+					cycle = [before]
+					
+					while node is not None:
+						cycle.append(node)
+						node = forward[node]
+					
+					raise LookupError("Circular dependency found: " + repr(_without_barriers(cycle)))
+				
+				if successor not in forward and position[successor] < upper:
+					forward[successor] = node
+					stack.append(successor)
+		
+		backward = {before}  # Nodes which must precede `before`.
+		stack = [before]
+		
+		while stack:
+			node = stack.pop()
+			
+			for predecessor in self._predecessors[node]:
+				if predecessor not in backward and position[predecessor] > lower:
+					backward.add(predecessor)
+					stack.append(predecessor)
+		
+		nodes = sorted(backward, key=position.__getitem__) + sorted(forward, key=position.__getitem__)
+		
+		for node, slot in zip(nodes, sorted(position[node] for node in nodes)):
+			position[node] = slot
+
+
 class ExtensionManager(PluginManager):
 	"""More advanced plugin architecture using structured "extensions".
 	
@@ -101,74 +776,287 @@ class ExtensionManager(PluginManager):
 	* `first` — declare that this extension is a dependency of all other non-first extensions
 	* `last` — declare that this extension depends on all other non-last extensions
 	
+	Resolved orderings are cached, keyed on the identity and declared metadata of the extensions being ordered. The
+	cache is cleared whenever a plugin is registered; if you mutate the metadata of an extension after ordering it,
+	the new metadata is noticed on the next call.
 	"""
 	
+	order_cache_size: int = 32  # The maximum number of distinct extension orderings to remember.
+	
+	def __init__(self, *args, **kw):
+		self._orders: 'OrderedDict[tuple, List[Plugin]]' = OrderedDict()
+		self._graph: Optional[ExtensionGraph] = None
+		super().__init__(*args, **kw)
+	
+	@property
+	def graph(self) -> ExtensionGraph:
+		"""An incrementally maintained ordering of the registered extensions, built on first access.
+		
+		Once built, extensions subsequently registered are added to it, rather than requiring a full re-ordering. Those
+		deferred by a lazy rescan can't be added until imported, so the graph is instead rebuilt on next access.
+		"""
+		
+		graph = self._graph
+		
+		if graph is None:
+			with self._lock:
+				graph = self._graph
+				
+				if graph is None:
+					graph = self._graph = ExtensionGraph(self.plugins)
+		
+		return graph
+	
+	def register(self, name:str, plugin:object) -> None:
+		super().register(name, plugin)
+		self._orders.clear()
+		
+		with self._lock:
+			graph = self._graph
+			
+			if graph is not None and plugin not in graph:
+				try:
+					graph.add(plugin)
+				except (LookupError, RuntimeError):
+					self._graph = None  # Rebuilt, raising the problem, on next access.
+	
+	def _defer(self, name:str, entry) -> None:
+		with self._lock:
+			super()._defer(name, entry)
+			self._graph = None  # Rebuilt, importing the deferred plugin, on next access.
+	
 	def order(self, config=None, prefix=''):
+		"""Resolve the dependency order of the given (or registered) extensions, from least to most dependent.
+		
+		A new list is returned on each call; the cached ordering itself is never exposed.
+		"""
+		
+		return list(self._memoize('order', traverse(config if config else self.plugins, prefix), self._order))
+	
+	def order_layers(self, config=None, prefix=''):
+		"""Resolve the given (or registered) extensions into layers ("waves") of mutually independent extensions.
+		
+		Every extension a given extension depends upon appears in an earlier layer, allowing the extensions of each
+		layer to be started concurrently once the prior layer has completed. Within each layer, extensions retain their
+		relative configured order. A new list of new lists is returned on each call.
+		"""
+		
+		layers = self._memoize('layers', traverse(config if config else self.plugins, prefix), self._layers)
+		return [list(layer) for layer in layers]
+	
+	def plan(self, config=None, prefix:str='', hooks:Iterable[str]=()) -> DispatchPlan:
+		"""Retrieve the dispatch plan for the given (or registered) extensions, in dependency order.
+		
+		Plans are cached alongside the orderings they are built from; the same plan is returned for the same extensions
+		until the cache is cleared. Optionally resolve the named `hooks` up-front, rather than on first use.
+		"""
+		
 		extensions = traverse(config if config else self.plugins, prefix)
+		plan = self._memoize('plan', extensions, self._plan)
 		
-		# First, we check that everything absolutely required is configured.
+		for hook in hooks:
+			plan[hook]
 		
-		provided: Flags = cast(Flags, set().union(*(traverse(ext, 'provides', ()) for ext in extensions)))
-		needed: Flags = cast(Flags, set().union(*(traverse(ext, 'needs', ()) for ext in extensions)))
+		return plan
+	
+	async def run(self, hook:str, *args, config=None, prefix:str='', concurrency:int=0, reverse:bool=False, **kw) \
+			-> Dict[Plugin, Any]:
+		"""Invoke the named hook of every given (or registered) extension, concurrently where dependencies permit.
 		
-		if not provided.issuperset(needed):
-			raise LookupError("Extensions providing the following features must be configured:\n" + \
-					', '.join(needed.difference(provided)))
+		Each extension's hook is invoked, with any additional arguments given, as soon as the hooks of all extensions it
+		depends upon have completed; hooks may be coroutine functions or plain callables. Extensions lacking the hook are
+		considered complete immediately. If `concurrency` is non-zero, at most that many hooks are in progress at once.
 		
-		# Now we spider the configured extensions and graph them.  This is a multi-step process.
-		# First, create a mapping of feature names to extensions.  We only want extension objects in our initial graph.
+		Pass `reverse=True` for shutdown-style hooks, invoking each extension's hook only once those of all extensions
+		depending upon it have completed.
 		
-		universal: List[Plugin] = list()
-		inverse: List[Plugin] = list()
-		provides: Dict[str, Plugin] = dict()
-		excludes: Dict[str, Plugin] = dict()
+		Returns a mapping of extensions to the values returned by their hooks, in the order invoked. If a hook raises,
+		the hooks of extensions waiting on it are skipped, others are allowed to complete, then the exception is raised.
+		"""
 		
-		for ext in extensions:
-			for feature in traverse(ext, 'provides', ()):
-				provides[feature] = ext
+		import asyncio  # Only needed here; avoid the import cost otherwise.
+		from inspect import isawaitable
+		
+		extensions = traverse(config if config else self.plugins, prefix)
+		ordered = self._memoize('order', extensions, self._order)  # Also rejects circular dependencies.
+		dependencies = self._memoize('graph', extensions, self._dependencies)
+		
+		if reverse:
+			ordered = ordered[::-1]
+			prerequisites: Dict[Plugin, List[Plugin]] = {ext: [] for ext in dependencies}
 			
-			for feature in traverse(ext, 'excludes', ()):
-				excludes.setdefault(feature, []).append(ext)
+			for ext, requirements in dependencies.items():
+				for requirement in requirements:
+					prerequisites[requirement].append(ext)
+		
+		else:
+			prerequisites = cast(Dict[Plugin, List[Plugin]], dependencies)
+		
+		limit = asyncio.Semaphore(concurrency) if concurrency else None
+		tasks: Dict[Plugin, Any] = {}
+		
+		async def invoke(ext:Plugin) -> Any:
+			waiting = [tasks[other] for other in prerequisites[ext]]
+			if waiting: await asyncio.gather(*waiting)
+			
+			callback = None if ext.__class__ is Barrier else getattr(ext, hook, None)
+			if callback is None: return None
+			
+			if limit is None:
+				result = callback(*args, **kw)
+				return (await result) if isawaitable(result) else result
 			
-			if traverse(ext, 'first', False):
-				universal.append(ext)
-			elif traverse(ext, 'last', False):
-				inverse.append(ext)
+			async with limit:
+				result = callback(*args, **kw)
+				return (await result) if isawaitable(result) else result
 		
-		# We bail early if there are known conflicts up-front.
+		for node in dependencies:  # Tasks are all created before any may execute, and so before any await another.
+			tasks[node] = asyncio.ensure_future(invoke(node))
 		
-		for conflict in set(provides) & set(excludes):
-			raise RuntimeError("{!r} precludes use of '{!s}', which is defined by {!r}".format(
-					excludes[conflict], conflict, provides[conflict]))
+		outcomes = dict(zip(tasks, await asyncio.gather(*tasks.values(), return_exceptions=True)))
 		
-		# Now we build the initial graph.
+		for ext in ordered:  # In invocation order, the first failure is the original, not a propagated one.
+			if isinstance(outcomes[ext], BaseException):
+				raise outcomes[ext]
 		
-		dependencies: Dict[Plugin, Flags] = dict()
+		return {ext: outcomes[ext] for ext in ordered}
+	
+	def _memoize(self, kind:str, extensions:List[Plugin], resolve):
+		"""Return the cached result of resolving the given extensions, or resolve and cache it.
 		
-		for ext in extensions:
-			# We build a set of requirements from needs + uses that have been fulfilled.
-			requirements = set(traverse(ext, 'needs', ()))
-			requirements.update(set(traverse(ext, 'uses', ())).intersection(provided))
-			
-			dependencies[ext] = set(provides[req] for req in requirements)
+		The metadata of each extension is read once, both to form the cache key and to resolve the result.
+		"""
+		
+		metadata = [Metadata.of(ext) for ext in extensions]
+		key = (kind, ) + tuple(zip(map(id, extensions), metadata))  # Identities can't be reused while cached.
+		
+		with self._lock:
+			result = self._orders.get(key)
 			
-			if universal and ext not in universal:
-				dependencies[ext].update(universal)
+			if result is not None:
+				self._orders.move_to_end(key)
+				return result
+		
+		result = resolve(extensions, metadata)  # Every extension is referenced by the result, keeping it alive.
+		
+		with self._lock:
+			self._orders[key] = result
 			
-			if inverse and ext in inverse:
-				dependencies[ext].update(set(extensions).difference(inverse))
+			while len(self._orders) > self.order_cache_size:
+				self._orders.popitem(last=False)
 		
+		return result
+	
+	def _plan(self, extensions:List[Plugin], metadata:Optional[List[Metadata]]=None) -> DispatchPlan:
+		return DispatchPlan(self._memoize('order', extensions, self._order))
+	
+	def _order(self, extensions:List[Plugin], metadata:Optional[List[Metadata]]=None) -> List[Plugin]:
 		# Build the final "unidirected acyclic graph"; a list of extensions in dependency-resolved order.
-		dependencies = robust_topological_sort(dependencies)
+		dependencies = robust_topological_sort(self._dependencies(extensions, metadata))
 		
 		# If there are any tuple elements, we've got a circular reference!
 		extensions = []
 		for ext in dependencies:
 			if len(ext) > 1:
-				raise LookupError("Circular dependency found: " + repr(ext))
+				raise LookupError("Circular dependency found: " + repr(_without_barriers(ext)))
 			
-			extensions.append(ext[0])
+			if ext[0].__class__ is not Barrier:
+				extensions.append(ext[0])
 		
 		extensions.reverse()
 		
 		return extensions
+	
+	def _layers(self, extensions:List[Plugin], metadata:Optional[List[Metadata]]=None) -> List[List[Plugin]]:
+		dependencies = self._dependencies(extensions, metadata)
+		dependents: Dict[Plugin, List[Plugin]] = {ext: [] for ext in dependencies}
+		
+		for ext, requirements in dependencies.items():
+			for requirement in requirements:
+				dependents[requirement].append(ext)
+		
+		# Layering from the dependency side places each extension in the earliest layer it can occupy.
+		layers = topological_layers(dependents)
+		
+		if sum(len(layer) for layer in layers) < len(dependencies):  # Cyclic extensions are omitted; find them.
+			for component in robust_topological_sort(dependencies):
+				if len(component) > 1 or component[0] in dependencies[component[0]]:
+					raise LookupError("Circular dependency found: " + repr(_without_barriers(component)))
+			
+			layered = set(ext for layer in layers for ext in layer)  # Never return a partial layering.
+			raise LookupError("Unable to order extensions: " + repr(_without_barriers(
+					tuple(ext for ext in dependencies if ext not in layered))))
+		
+		# Barriers always occupy a layer of their own.
+		return [layer for layer in layers if layer[0].__class__ is not Barrier]
+	
+	def _dependencies(self, extensions:List[Plugin], metadata:Optional[List[Metadata]]=None) -> Dict[Any, Set[Any]]:
+		"""Construct the mapping of each extension to the set of extensions it depends upon.
+		
+		Rather than every other extension depending upon each `first` extension directly, they depend upon the `FIRST`
+		barrier, which depends upon the `first` extensions; `last` extensions are handled similarly, using the `LAST`
+		barrier. Each barrier is only present if required. This keeps the size of the graph linear in the number of
+		extensions and declared dependencies.
+		"""
+		
+		if metadata is None:
+			metadata = [Metadata.of(ext) for ext in extensions]
+		
+		# First, create a mapping of feature names to extensions, and check that everything required is configured.
+		
+		provides: Dict[str, Plugin] = dict()
+		excludes: Dict[str, List[Plugin]] = dict()
+		needed: Flags = set()
+		universal = inverse = False
+		
+		for ext, declared in zip(extensions, metadata):
+			for feature in declared.provides:
+				provides[feature] = ext
+			
+			for feature in declared.excludes:
+				excludes.setdefault(feature, []).append(ext)
+			
+			needed.update(declared.needs)
+			universal = universal or declared.first
+			inverse = inverse or declared.last
+		
+		if not needed.issubset(provides):
+			raise LookupError("Extensions providing the following features must be configured:\n" + \
+					', '.join(needed.difference(provides)))
+		
+		# We bail early if there are known conflicts up-front.
+		
+		for conflict in set(provides) & set(excludes):
+			raise RuntimeError("{!r} precludes use of '{!s}', which is defined by {!r}".format(
+					excludes[conflict], conflict, provides[conflict]))
+		
+		# Now we build the graph, from the requirements (needs + uses) which have been fulfilled.
+		
+		dependencies: Dict[Any, Set[Any]] = dict()
+		first: Set[Plugin] = set()
+		last: Set[Plugin] = set()
+		
+		for ext, declared in zip(extensions, metadata):
+			requirements = dependencies[ext] = set(provides[feature] for feature in declared.needs)
+			requirements.update(provides[feature] for feature in declared.uses if feature in provides)
+			requirements.discard(ext)  # An extension may use a feature it provides itself.
+			
+			if universal:
+				if declared.first:
+					first.add(ext)
+				else:
+					requirements.add(FIRST)
+			
+			if inverse:
+				if declared.last:
+					requirements.add(LAST)
+				else:
+					last.add(ext)
+		
+		if universal:
+			dependencies[FIRST] = first
+		
+		if inverse:
+			dependencies[LAST] = last
+		
+		return dependencies
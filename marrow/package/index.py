@@ -0,0 +1,309 @@
+"""A shared, thread-safe index of installed entry points, keyed by namespace.
+
+Scanning installed distribution metadata for the entry points of a namespace requires visiting every distribution on
+the search path. The index performs this scan once, collecting the entry points of every namespace in a single pass
+using `importlib.metadata`, and serves subsequent lookups from the resulting table until the environment changes.
+
+The `importlib.metadata` machinery is not imported until the table is first required.
+
+The resolved table may optionally be persisted to disk as a snapshot, keyed by a fingerprint of the installed
+distribution metadata, allowing new processes to skip the scan entirely. The shared `entry_points` index will utilize
+the snapshot file named by the `MARROW_PACKAGE_SNAPSHOT` environment variable, if defined.
+"""
+
+import os
+import re
+import sys
+
+from collections import namedtuple
+from functools import reduce
+from importlib import import_module
+from logging import getLogger as _logger
+from threading import RLock
+from typing import Dict, List, Mapping, Optional
+
+
+log = _logger(__name__)
+
+SNAPSHOT_VERSION = 1
+METADATA_SUFFIXES = ('.dist-info', '.egg-info')
+
+
+class EntryPoint(namedtuple('EntryPoint', ('name', 'value', 'group'))):
+	"""A lightweight, serializable record of an entry point declaration.
+	
+	This mirrors the portion of the `importlib.metadata.EntryPoint` interface utilized by this package.
+	"""
+	
+	__slots__ = ()
+	
+	name:str
+	value:str
+	group:str
+	
+	pattern = re.compile(r'(?P<module>[\w.]+)\s*(:\s*(?P<attr>[\w.]+)\s*)?((?P<extras>\[.*\])\s*)?$')
+	
+	@property
+	def module(self) -> str:
+		return self.pattern.match(self.value).group('module')
+	
+	@property
+	def attr(self) -> Optional[str]:
+		return self.pattern.match(self.value).group('attr')
+	
+	@property
+	def reference(self) -> str:
+		"""The dot-colon object reference this entry point refers to, without any declared extras."""
+		
+		module, attr = self.pattern.match(self.value).group('module', 'attr')
+		return (module + ':' + attr) if attr else module
+	
+	def load(self):
+		"""Import the referenced module and return the referenced object from within it.
+		
+		As with `pkg_resources`, failure to find the referenced object within the module raises an `ImportError`.
+		"""
+		
+		module, attr = self.pattern.match(self.value).group('module', 'attr')
+		obj = import_module(module)
+		
+		try:
+			return reduce(getattr, attr.split('.') if attr else (), obj)
+		except AttributeError as exc:
+			raise ImportError(str(exc)) from exc
+
+
+Table = Dict[str, Dict[str, EntryPoint]]
+
+
+def fingerprint(path:Optional[List[str]]=None) -> str:
+	"""Calculate a fingerprint of the installed distributions found on the given (or current) search path.
+	
+	This incorporates the search path itself, and the name (including version) and modification time of each
+	distribution metadata directory found within it. No distribution metadata is read.
+	"""
+	
+	from hashlib import sha1
+	
+	digest = sha1()  # nosec - Used for change detection, not security.
+	
+	for entry in (sys.path if path is None else path):
+		digest.update(b'\0' + os.fsencode(entry))
+		
+		try:
+			with os.scandir(entry or '.') as contents:
+				found = sorted((i.name, i.stat().st_mtime_ns) for i in contents if i.name.endswith(METADATA_SUFFIXES))
+		
+		except OSError:  # Zip files, missing folders, etc.
+			try:
+				found = [('', os.stat(entry).st_mtime_ns)]
+			except OSError:
+				continue
+		
+		for name, mtime in found:
+			digest.update(name.encode('utf-8') + b'\0' + str(mtime).encode('ascii') + b'\0')
+	
+	return digest.hexdigest()
+
+
+class EntryPointIndex:
+	"""An index of the entry points advertised by the installed distributions.
+	
+	The table is built lazily on first use and rebuilt if `sys.path` is altered. If `pkg_resources` has been imported
+	by the time the table is built, the addition of distributions to its working set will also invalidate the table.
+	Use `invalidate()` to explicitly discard the table after altering the environment in other ways, such as
+	installing a package into an existing search path at runtime.
+	
+	If a `snapshot` path is given, the table is loaded from that file, using a single read, when the fingerprint
+	recorded within it matches the current environment. Otherwise the installed distributions are scanned and the
+	snapshot is rewritten.
+	
+	Where more than one distribution declares the same plugin name within a namespace, the first one found in
+	`sys.path` order wins, mirroring the shadowing behaviour of imports.
+	"""
+	
+	__slots__ = ('snapshot', '_lock', '_table', '_reverse', '_path', '_subscribed')
+	
+	snapshot: Optional[str]
+	_lock: RLock
+	_table: Optional[Table]
+	_reverse: Dict[str, Dict[str, str]]
+	_path: Optional[List[str]]
+	_subscribed: bool
+	
+	def __init__(self, snapshot:Optional[str]=None):
+		self.snapshot = snapshot
+		self._lock = RLock()
+		self._table = None
+		self._reverse = {}
+		self._path = None
+		self._subscribed = False
+	
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + ("stale" if self._table is None else repr(sorted(self._table))) + ")"
+	
+	def __getitem__(self, namespace:str) -> Mapping[str, EntryPoint]:
+		"""Retrieve the mapping of plugin names to entry points for the given namespace.
+		
+		Unknown namespaces result in an empty mapping. The mapping returned must not be mutated.
+		"""
+		
+		return self.table.get(namespace) or {}
+	
+	def __contains__(self, namespace:str) -> bool:
+		return namespace in self.table
+	
+	@property
+	def table(self) -> Table:
+		"""The complete table of namespaces to plugin names to entry points, rebuilt if stale."""
+		
+		table = self._table
+		
+		if table is None or self._path != sys.path:
+			with self._lock:  # Only one thread need perform the scan.
+				table = self._table
+				
+				if table is None or self._path != sys.path:
+					table = self._build()
+		
+		return table
+	
+	def lookup(self, namespace:str, name:str) -> EntryPoint:
+		"""Retrieve a single named entry point from the given namespace, raising a LookupError if not present."""
+		
+		entries = self[namespace]
+		
+		try:
+			return entries[name]
+		except KeyError:
+			pass
+		
+		raise LookupError('Unknown plugin "' + name + '"; found: ' + ', '.join(entries))
+	
+	def reverse(self, namespace:str) -> Mapping[str, str]:
+		"""Retrieve a mapping of object references to plugin names for the given namespace.
+		
+		This is built on first request for each namespace, and discarded along with the table it was built from. If
+		more than one plugin name within the namespace refers to the same object, the first name is used.
+		"""
+		
+		reverse = self._reverse  # Must be read prior to the table; if rebuilt, the mapping is discarded with it.
+		table = self.table
+		mapping = reverse.get(namespace)
+		
+		if mapping is None:
+			mapping = {}
+			
+			for name, entry in (table.get(namespace) or {}).items():
+				mapping.setdefault(entry.reference, name)
+			
+			reverse[namespace] = mapping
+		
+		return mapping
+	
+	def invalidate(self) -> None:
+		"""Discard the current table, forcing a rescan of installed distributions on next access."""
+		
+		self._table = None
+		self._reverse = {}
+	
+	def save(self, snapshot:Optional[str]=None) -> None:
+		"""Write the current table to the given (or configured) snapshot file, atomically replacing it."""
+		
+		target = snapshot or self.snapshot
+		
+		if not target:
+			raise ValueError("No snapshot path given or configured.")
+		
+		with self._lock:
+			table = self.table
+			self._write(target, fingerprint(self._path), table)
+	
+	def _changed(self, dist) -> None:
+		"""Working set subscription callback, executed when a new distribution is activated."""
+		
+		self.invalidate()
+	
+	def _read(self, target:str, expect:str) -> Optional[Table]:
+		"""Attempt to load the table from a snapshot, returning None if missing, unusable, or stale."""
+		
+		from json import loads
+		
+		try:
+			with open(target, 'rb') as fh:
+				data = loads(fh.read())
+			
+			if data['version'] != SNAPSHOT_VERSION or data['fingerprint'] != expect:
+				return None
+			
+			return {group: {name: EntryPoint(name, value, group) for name, value in entries} \
+					for group, entries in data['table'].items()}
+		
+		except FileNotFoundError:
+			return None
+		
+		except (OSError, ValueError, TypeError, KeyError):
+			log.warning("Ignoring unusable entry point snapshot: " + target, exc_info=True)
+		
+		return None
+	
+	def _write(self, target:str, identity:str, table:Table) -> None:
+		from json import dump
+		
+		data = {
+				'version': SNAPSHOT_VERSION,
+				'fingerprint': identity,
+				'table': {group: [[name, entry.value] for name, entry in entries.items()] \
+						for group, entries in table.items()},
+			}
+		
+		partial = target + '.' + str(os.getpid()) + '.tmp'
+		
+		with open(partial, 'w', encoding='utf-8') as fh:
+			dump(data, fh, separators=(',', ':'))
+		
+		os.replace(partial, target)  # Atomic; concurrently starting processes never observe a partial write.
+	
+	def _scan(self) -> Table:
+		from importlib.metadata import distributions
+		
+		table: Table = {}
+		
+		for dist in distributions():
+			for entry in dist.entry_points:
+				group = table.setdefault(entry.group, {})
+				
+				if entry.name not in group:
+					group[entry.name] = EntryPoint(entry.name, entry.value, entry.group)
+		
+		return table
+	
+	def _build(self) -> Table:
+		path = list(sys.path)
+		table = None
+		
+		if self.snapshot:
+			identity = fingerprint(path)
+			table = self._read(self.snapshot, identity)
+		
+		if table is None:
+			table = self._scan()
+			
+			if self.snapshot:
+				try:
+					self._write(self.snapshot, identity, table)
+				except OSError:
+					log.warning("Unable to write entry point snapshot: " + self.snapshot, exc_info=True)
+		
+		if not self._subscribed and 'pkg_resources' in sys.modules:
+			sys.modules['pkg_resources'].working_set.subscribe(self._changed, existing=False)
+			self._subscribed = True
+		
+		self._path = path
+		self._reverse = {}
+		self._table = table
+		
+		return table
+
+
+entry_points = EntryPointIndex(os.environ.get('MARROW_PACKAGE_SNAPSHOT') or None)
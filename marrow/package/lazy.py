@@ -1,20 +1,43 @@
+from functools import partial
 from threading import RLock
 from collections.abc import MutableMapping
-from typeguard import typechecked
-from typing import Any, Callable
+from typing import Any, Callable, Dict, Optional
+from weakref import ref
 
 from .loader import traverse, load
+from .typecheck import typechecked
 
 
 sentinel = object()
 
 
+class Cached(ref):
+	"""A weak reference to an instance lacking both `__dict__` and a designated slot, holding its cached value."""
+	
+	__slots__ = ('key', 'value')
+	
+	def __new__(cls, instance, callback, value):
+		return super().__new__(cls, instance, callback)
+	
+	def __init__(self, instance, callback, value):
+		super().__init__(instance, callback)
+		self.key = id(instance)
+		self.value = value
+
+
 class lazy:
 	"""Lazily record the result of evaluating a function and cache the result.
 	
 	This is a non-data descriptor which tells Python to allow the instance `__dict__` to override, naturally caching
-	the result. As a consequence of this assignment, whatever name is given to the lazy property must be included in
-	the class' `__slots__` declaration, if one is given.
+	the result there. Classes whose instances lack a `__dict__`, by declaring `__slots__`, may instead designate a slot
+	to hold the cached value by passing its name as `slot`. Failing that, values are held in a table belonging to the
+	descriptor, keyed by instance identity, and discarded when the instance is collected; this requires the instances
+	to be weakly referenceable, by including `__weakref__` within `__slots__`. Each such value costs more memory than it
+	would within a `__dict__`; designate a slot where memory use is a concern.
+	
+	The function is called at most once per instance, even if the attribute is first accessed from several threads at
+	once; those threads wait for the first to complete. Threads accessing the attribute of different instances do not
+	wait on each other, and once calculated, the value is retrieved without locking.
 	
 	Use as a decorator just like `@property`:
 	
@@ -27,15 +50,24 @@ class lazy:
 		obj = MyClass()
 		assert obj.myattr == 42 # Executed!
 		assert obj.myattr == 42 # Not.
+	
+	Or, for a class using `__slots__`:
+	
+		class Compact:
+			__slots__ = ('_myattr', )
+			
+			myattr = lazy(calculate, slot='_myattr')
 	"""
 	
 	@typechecked
-	def __init__(self, func:Callable[[Any], None], name:str=None, doc:str=None):
+	def __init__(self, func:Callable[[Any], None], name:str=None, doc:str=None, slot:Optional[str]=None):
 		self.__name__ = name or func.__name__
 		self.__module__ = func.__module__
 		self.__doc__ = func.__doc__
-		self.lock = RLock()
+		self.locks: Dict[int, RLock] = {}  # Keyed by the identity of instances whose value is being calculated.
+		self.values: Dict[int, Cached] = {}  # Values for instances having neither __dict__ nor slot.
 		self.func = func
+		self.slot = slot
 	
 	def __repr__(self):
 		return "lazy(" + repr(self.func) + ")"
@@ -44,17 +76,129 @@ class lazy:
 		if instance is None:  # Allow direct access to the non-data descriptor via the class.
 			return self
 		
-		with self.lock:  # Try to avoid situations with parallel thread access hammering the function.
-			value = instance.__dict__.get(self.__name__, sentinel)
-			
-			if value is sentinel:
-				value = instance.__dict__[self.__name__] = self.func(instance)
+		value = self._retrieve(instance)
+		
+		if value is not sentinel:  # Already calculated; no lock is required to retrieve it.
+			return value
+		
+		# Only threads calculating the value for the same instance wait on each other; the lock exists only as long as
+		# the calculation, during which the instance can't be collected, so its identity can't be reused.
+		key = id(instance)
+		lock = self.locks.setdefault(key, RLock())
+		
+		try:
+			with lock:
+				value = self._retrieve(instance)
+				
+				if value is sentinel:
+					value = self.func(instance)
+					self._store(instance, value)
+		
+		finally:
+			if self.locks.get(key) is lock:
+				self.locks.pop(key, None)
 		
 		return value
+	
+	def _retrieve(self, instance):
+		if self.slot:
+			return getattr(instance, self.slot, sentinel)
+		
+		try:
+			return instance.__dict__.get(self.__name__, sentinel)
+		except AttributeError:
+			pass
+		
+		entry = self.values.get(id(instance))
+		
+		if entry is None or entry() is not instance:
+			return sentinel
+		
+		return entry.value
+	
+	def _store(self, instance, value) -> None:
+		if self.slot:
+			setattr(instance, self.slot, value)
+			return
+		
+		try:
+			instance.__dict__[self.__name__] = value
+			return
+		except AttributeError:
+			pass
+		
+		try:
+			self.values[id(instance)] = Cached(instance, self._collected, value)
+		except TypeError:
+			raise TypeError("Instances of " + instance.__class__.__qualname__ + " can not cache lazy values; declare a "
+					"slot to use, or include __weakref__ within __slots__.") from None
+	
+	def _collected(self, reference:'Cached') -> None:
+		if self.values.get(reference.key) is reference:
+			del self.values[reference.key]
+
+
+class alazy(lazy):
+	"""Lazily record the result of awaiting a coroutine function and cache the result.
+	
+	Accessing the attribute returns an awaitable. The first access, which must occur within a running event loop,
+	schedules a task calling the function; accesses made while that task is running share it, so the function is
+	called at most once per instance regardless of how many tasks await the attribute at once.
+	
+	Awaiters are shielded from each other: cancelling one task awaiting the attribute does not cancel the calculation,
+	which continues on behalf of the remainder, and its result is cached even if every awaiter was cancelled. Should
+	the calculation raise an exception, or itself be cancelled, every awaiter receives that outcome and nothing is
+	cached; the next access will try again. Once successful, the completed task is cached just as `lazy` caches values,
+	to be awaited again without further scheduling.
+	
+		class MyClass:
+			@alazy
+			async def myattr(self):
+				print("Executed!")
+				return 42
+		
+		obj = MyClass()
+		assert await obj.myattr == 42 # Executed!
+		assert await obj.myattr == 42 # Not.
+	"""
+	
+	@typechecked
+	def __init__(self, func:Callable[[Any], Any], name:str=None, doc:str=None, slot:Optional[str]=None):
+		super().__init__(func, name, doc, slot)
+		self.pending: Dict[int, Any] = {}  # Tasks calculating values, keyed by the identity of the instance.
+	
+	def __repr__(self):
+		return "alazy(" + repr(self.func) + ")"
+	
+	def __get__(self, instance, type=None):
+		if instance is None:
+			return self
+		
+		task = self._retrieve(instance)
+		
+		if task is not sentinel:  # A completed task; awaiting it returns its result immediately.
+			return task
+		
+		from asyncio import get_running_loop, shield
+		
+		key = id(instance)
+		task = self.pending.get(key)
+		
+		if task is None:  # The callback references the instance until it runs, so its identity can't be reused.
+			task = self.pending[key] = get_running_loop().create_task(self.func(instance))
+			task.add_done_callback(partial(self._settle, instance))
+		
+		return shield(task)
+	
+	def _settle(self, instance, task) -> None:
+		del self.pending[id(instance)]
+		
+		if not task.cancelled() and task.exception() is None:
+			self._store(instance, task)
 
 
 @typechecked
-def lazyload(reference: str, *args, **kw):
+def lazyload(reference: str, *args, slot: Optional[str]=None, **kw):
 	"""Lazily load and cache an object reference upon dereferencing.
 	
 	Assign the result of calling this function with either an object reference passed in positionally:
@@ -68,7 +212,7 @@ def lazyload(reference: str, *args, **kw):
 			target = 'logging:info'
 			log = lazyload('.target')
 	
-	Additional arguments are passed to the eventual call to `load()`.
+	Additional arguments are passed to the eventual call to `load()`, excepting `slot`, which is passed to `lazy`.
 	"""
 	
 	def lazily_load_reference(self):
@@ -79,4 +223,4 @@ def lazyload(reference: str, *args, **kw):
 		
 		return load(ref, *args, **kw)
 	
-	return lazy(lazily_load_reference)
+	return lazy(lazily_load_reference, slot=slot)
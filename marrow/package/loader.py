@@ -1,9 +1,9 @@
 import os
 
-from pkg_resources import iter_entry_points, resource_filename
-from typing import Sequence, Optional
+from typing import Any, Optional, Sequence, Tuple, Union
 
-from typeguard import typechecked
+from .index import entry_points
+from .typecheck import typechecked
 
 nodefault = object()
 
@@ -92,12 +92,7 @@ def load(target:str, namespace:str=None, default=nodefault, executable:bool=Fals
 		raise LookupError("Can not target an attribute from a file on-disk.")
 	
 	if namespace and separators[1] not in target:
-		allowable = dict((i.name,  i) for i in iter_entry_points(namespace))
-		
-		if target not in allowable:
-			raise LookupError('Unknown plugin "' + target + '"; found: ' + ', '.join(allowable))
-		
-		return allowable[target].load()
+		return entry_points.lookup(namespace, target).load()
 	
 	if separators[2] in target:
 		target, _, path = target.partition(separators[2])
@@ -105,6 +100,8 @@ def load(target:str, namespace:str=None, default=nodefault, executable:bool=Fals
 		if not target or not path:
 			raise LookupError("Must specify a target package and package-relative path.")
 		
+		from pkg_resources import resource_filename  # Deferred; costly to import and rarely needed.
+		
 		path = path.replace('/', os.path.sep)  # Adapt to platform conventions.
 		path = resource_filename(target, path)
 		
@@ -127,3 +124,162 @@ def load(target:str, namespace:str=None, default=nodefault, executable:bool=Fals
 			executable = executable,
 			protect = protect
 		) if target else obj
+
+
+class Traversal:
+	"""A pre-parsed attribute path, callable to traverse any object in the same way as `traverse`.
+	
+	Path segments are split, numeric segments converted to integer indexes, and protected segments identified once, up
+	front, leaving only the lookups themselves to perform on each call. Construct using `compile`.
+	"""
+	
+	__slots__ = ('path', 'segments', 'default', 'executable')
+	
+	path: str
+	segments: Tuple[Tuple[Optional[str], Union[int, str]], ...]  # Pairs of attribute name (or None) and item key.
+	default: Any
+	executable: bool
+	
+	def __init__(self, path:str, default=nodefault, executable:bool=False, separator:str='.', protect:bool=True):
+		segments = []
+		
+		for name in (path.split(separator) if path else ()):
+			numeric = name.lstrip('-').isdigit()
+			attribute = None if numeric or (protect and name.startswith('_')) else name
+			segments.append((attribute, int(name) if numeric else name))
+		
+		self.path = path
+		self.segments = tuple(segments)
+		self.default = default
+		self.executable = executable
+	
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + repr(self.path) + ")"
+	
+	def __call__(self, obj, default=nodefault):
+		"""Traverse the given object, returning the default (if given here or when compiled) if unable to resolve."""
+		
+		value = obj
+		executable = self.executable
+		
+		for attribute, key in self.segments:
+			if attribute is not None:
+				try:
+					value = getattr(value, attribute)
+					
+					if executable and callable(value):
+						value = value()
+					
+					continue
+				
+				except AttributeError:
+					pass
+			
+			try:
+				value = value[key]
+			
+			except (KeyError, TypeError):
+				if default is nodefault:
+					default = self.default
+				
+				if default is nodefault:
+					raise LookupError("Could not resolve '" + self.path + "' on: " + repr(obj))
+				
+				return default
+		
+		return value
+
+
+class Reference:
+	"""A pre-parsed object reference, callable to load the referenced object in the same way as `load`.
+	
+	The module to import and the attribute path to traverse within it are determined once, up front. Plugin names and
+	package-relative file paths are passed through to `load` when called. Construct using `compile_reference`.
+	"""
+	
+	__slots__ = ('target', 'namespace', 'module', 'traversal', 'default', '_options')
+	
+	target: str
+	namespace: Optional[str]
+	module: Optional[str]
+	traversal: Optional[Traversal]
+	default: Any
+	
+	def __init__(self, target:str, namespace:Optional[str]=None, default=nodefault, executable:bool=False,
+			separators:Sequence[str]=('.', ':', '/'), protect:bool=True):
+		self.target = target
+		self.namespace = namespace
+		self.default = default
+		self._options = dict(namespace=namespace, executable=executable, separators=separators, protect=protect)
+		self.module = self.traversal = None
+		
+		if separators[1] in target and separators[2] in target:
+			raise LookupError("Can not target an attribute from a file on-disk.")
+		
+		if (namespace and separators[1] not in target) or separators[2] in target:
+			return  # Plugin references and file paths are resolved by load() itself.
+		
+		parts, _, path = target.partition(separators[1])
+		
+		self.module = parts
+		self.traversal = Traversal(
+				separators[0].join(parts.split(separators[0])[1:] + path.split(separators[0])) if path else '',
+				default = default,
+				executable = executable,
+				protect = protect
+			)
+	
+	def __repr__(self):
+		return self.__class__.__name__ + "(" + repr(self.target) + \
+				((", " + repr(self.namespace)) if self.namespace else "") + ")"
+	
+	def __call__(self, default=nodefault):
+		"""Resolve the reference, returning the default (if given here or when compiled) if unable to resolve."""
+		
+		if default is nodefault:
+			default = self.default
+		
+		if self.module is None:
+			return load(self.target, default=default, **self._options)
+		
+		try:
+			obj = __import__(self.module)
+		except ImportError:
+			if default is not nodefault:
+				return default
+			
+			raise
+		
+		return self.traversal(obj, default)
+
+
+@typechecked
+def compile(path:str, default=nodefault, executable:bool=False, separator:str='.', protect:bool=True) -> Traversal:
+	"""Pre-parse an attribute path for repeated traversal.
+	
+	Accepts the same arguments as `traverse`, less the object to traverse, returning a reusable callable. For example,
+	these are equivalent, though the compiled form performs substantially less work per call:
+	
+		traverse(obj, 'foo.0.bar')
+		compile('foo.0.bar')(obj)
+	
+	Type validation of arguments is performed here, once, not upon each call of the result.
+	"""
+	
+	return Traversal(path, default, executable, separator, protect)
+
+
+@typechecked
+def compile_reference(target:str, namespace:str=None, default=nodefault, executable:bool=False,
+		separators:Sequence[str]=('.', ':', '/'), protect:bool=True) -> Reference:
+	"""Pre-parse an object reference for repeated loading.
+	
+	Accepts the same arguments as `load`, returning a reusable callable. For example, these are equivalent:
+	
+		load('example.objects:Foo.new', executable=True)
+		compile_reference('example.objects:Foo.new', executable=True)()
+	
+	Type validation of arguments is performed here, once, not upon each call of the result.
+	"""
+	
+	return Reference(target, namespace, default, executable, separators, protect)
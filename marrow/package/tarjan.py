@@ -9,47 +9,74 @@ From a blog post by Paul Harrison: http://www.logarithmic.net/pfh/blog/012080831
 Some cleanup was applied, and Python 3 function annotations (typing module, typeguard validation) supplied.
 """
 
+from array import array
 from collections import defaultdict
-from typeguard import typechecked
-from typing import List, Mapping, MutableMapping, Sequence, Tuple, Iterable
+from typing import Dict, List, Mapping, MutableMapping, Sequence, Tuple, Iterable
+
+from .typecheck import typechecked
 
 Graph = Mapping[str, Iterable[str]]
 
 
 @typechecked
-def strongly_connected_components(graph: Graph) -> List[Tuple]:
+def strongly_connected_components(graph: Graph, compact: bool=False) -> List[Tuple]:
 	"""Find the strongly connected components in a graph using Tarjan's algorithm.
 	
 	The `graph` argument should be a dictionary mapping node names to sequences of successor nodes.
+	
+	This is an iterative formulation, using an explicit stack of in-progress nodes in place of recursion; it is not
+	limited by the interpreter's recursion limit, regardless of the length of dependency chains within the graph.
+	
+	If `compact` is truthy, the graph is first converted to the integer-indexed form described by `intern`, and the
+	search performed over that, using less memory for large graphs. The result is identical.
 	"""
 	
+	if compact:
+		nodes, offsets, targets = intern(graph)
+		return [tuple(nodes[i] for i in component) for component in _components(offsets, targets)[0]]
+	
 	result: List[Tuple[str, ...]] = []
 	stack: List[str] = []
 	low: MutableMapping[str, int] = {}
+	done = len(graph)  # The "low link" assigned to nodes belonging to an already emitted component.
 	
-	def visit(node: str):
-		if node in low: return
+	for root in graph:
+		if root in low: continue
 		
-		num = len(low)
-		low[node] = num
-		stack_pos = len(stack)
-		stack.append(node)
+		index = low[root] = len(low)
+		work = [(root, iter(graph[root]), index, len(stack))]  # Node, remaining successors, index, stack position.
+		stack.append(root)
 		
-		for successor in graph[node]:
-			visit(successor)
-			low[node] = min(low[node], low[successor])
-		
-		if num == low[node]:
-			component = tuple(stack[stack_pos:])
-			del stack[stack_pos:]
+		while work:
+			node, successors, num, stack_pos = work[-1]
 			
-			result.append(component)
+			for successor in successors:
+				if successor not in low:  # Descend; the remaining successors of this node are resumed later.
+					index = low[successor] = len(low)
+					work.append((successor, iter(graph[successor]), index, len(stack)))
+					stack.append(successor)
+					break
+				
+				if low[successor] < low[node]:
+					low[node] = low[successor]
 			
-			for item in component:
-				low[item] = len(graph)
-	
-	for node in graph:
-		visit(node)
+			else:  # All successors visited; this node is complete.
+				work.pop()
+				
+				if num == low[node]:
+					component = tuple(stack[stack_pos:])
+					del stack[stack_pos:]
+					
+					result.append(component)
+					
+					for item in component:
+						low[item] = done
+				
+				if work:
+					parent = work[-1][0]
+					
+					if low[node] < low[parent]:
+						low[parent] = low[node]
 	
 	return result
 
@@ -78,20 +105,61 @@ def topological_sort(graph:Graph) -> list:
 
 
 @typechecked
-def robust_topological_sort(graph: Graph) -> list:
-	"""Identify strongly connected components then perform a topological sort of those components."""
+def topological_layers(graph:Graph) -> List[list]:
+	"""Group the nodes of a graph into layers, in the manner of `topological_sort`.
+	
+	Every node is placed in a later layer than all nodes referencing it as a successor; the nodes within any one layer
+	have no relationship to each other. Within each layer, nodes retain their relative order of appearance as keys of
+	the graph. As with `topological_sort`, nodes participating in (or reachable only through) cycles are omitted.
+	"""
+	
+	count: MutableMapping[str, int] = defaultdict(lambda: 0)
+	
+	for node in graph:
+		for successor in graph[node]:
+			count[successor] += 1
+	
+	position = {node: i for i, node in enumerate(graph)}
+	result = []
+	layer = [node for node in graph if count[node] == 0]
+	
+	while layer:
+		result.append(layer)
+		following = []
+		
+		for node in layer:
+			for successor in graph[node]:
+				count[successor] -= 1
+				if count[successor] == 0:
+					following.append(successor)
+		
+		following.sort(key=position.__getitem__)
+		layer = following
+	
+	return result
+
+
+@typechecked
+def robust_topological_sort(graph: Graph, compact: bool=False) -> list:
+	"""Identify strongly connected components then perform a topological sort of those components.
+	
+	If `compact` is truthy, both steps are performed over the integer-indexed form of the graph described by `intern`,
+	using less memory for large graphs. The result is identical.
+	"""
+	
+	if compact:
+		return _robust_topological_sort(*intern(graph))
 	
 	components = strongly_connected_components(graph)
 	
-	node_component = {}
-	component_graph: Graph = {}
+	node_component: Dict[str, int] = {}  # Components are referenced by index; tuples are costly to hash and compare.
+	component_graph: Dict[int, List[int]] = {}
 	
-	for component in components:
+	for i, component in enumerate(components):
 		for node in component:
-			node_component[node] = component
-	
-	for component in components:
-		component_graph[component] = []
+			node_component[node] = i
+		
+		component_graph[i] = []
 	
 	for node in graph:
 		node_c = node_component[node]
@@ -100,6 +168,149 @@ def robust_topological_sort(graph: Graph) -> list:
 			successor_c = node_component[successor]
 			
 			if node_c != successor_c:
-				component_graph[node_c].append(successor_c) 
+				component_graph[node_c].append(successor_c)
+	
+	return [components[i] for i in topological_sort(component_graph)]
+
+
+def intern(graph: Graph) -> Tuple[list, array, array]:
+	"""Convert a graph into a compact, integer-indexed, "compressed sparse row" form.
+	
+	Returns a list of the nodes of the graph, whose positions serve as their identifiers, and two arrays of integers:
+	the successors of node `i` are identified by `targets[offsets[i]:offsets[i + 1]]`.
+	"""
+	
+	nodes = list(graph)
+	index = {node: i for i, node in enumerate(nodes)}
+	offsets = array('i', [0])
+	targets = array('i')
+	
+	for node in nodes:
+		targets.extend([index[successor] for successor in graph[node]])
+		offsets.append(len(targets))
+	
+	return nodes, offsets, targets
+
+
+def _components(offsets: array, targets: array) -> Tuple[List[List[int]], array]:
+	"""Tarjan's algorithm over an interned graph, mirroring `strongly_connected_components`.
+	
+	Returns the list of components, each a list of node identifiers, and an array mapping each node to the index of
+	the component containing it.
+	"""
+	
+	count = len(offsets) - 1
+	number = array('i', [-1]) * count  # Order of discovery; -1 if not yet visited.
+	low = array('i', [0]) * count
+	position = array('i', [0]) * count  # Stack position of each node at the time of its discovery.
+	cursor = offsets[:-1]  # The next successor of each node to examine.
+	membership = array('i', [-1]) * count
+	result: List[List[int]] = []
+	stack: List[int] = []
+	counter = 0
+	
+	for root in range(count):
+		if number[root] >= 0: continue
+		
+		number[root] = low[root] = counter
+		position[root] = len(stack)
+		counter += 1
+		stack.append(root)
+		work = [root]
+		
+		while work:
+			node = work[-1]
+			edge = cursor[node]
+			end = offsets[node + 1]
+			
+			while edge < end:
+				successor = targets[edge]
+				edge += 1
+				
+				if number[successor] < 0:  # Descend; the remaining successors of this node are resumed later.
+					cursor[node] = edge
+					number[successor] = low[successor] = counter
+					position[successor] = len(stack)
+					counter += 1
+					stack.append(successor)
+					work.append(successor)
+					break
+				
+				if low[successor] < low[node]:
+					low[node] = low[successor]
+			
+			else:  # All successors visited; this node is complete.
+				cursor[node] = edge
+				work.pop()
+				
+				if number[node] == low[node]:
+					component = stack[position[node]:]
+					del stack[position[node]:]
+					
+					for item in component:
+						membership[item] = len(result)
+						low[item] = count  # As per the "done" marker of the mapping-based implementation.
+					
+					result.append(component)
+				
+				if work:
+					parent = work[-1]
+					
+					if low[node] < low[parent]:
+						low[parent] = low[node]
+	
+	return result, membership
+
+
+def _robust_topological_sort(nodes: list, offsets: array, targets: array) -> list:
+	"""Identical in function to `robust_topological_sort`, over an interned graph."""
+	
+	components, membership = _components(offsets, targets)
+	size = len(components)
 	
-	return topological_sort(component_graph)
+	# Build the graph of components, in the same form, preserving the order in which edges are encountered.
+	
+	component_offsets = array('i', [0]) * (size + 1)
+	
+	for node in range(len(nodes)):
+		node_c = membership[node]
+		
+		for edge in range(offsets[node], offsets[node + 1]):
+			if membership[targets[edge]] != node_c:
+				component_offsets[node_c + 1] += 1
+	
+	for i in range(size):
+		component_offsets[i + 1] += component_offsets[i]
+	
+	fill = component_offsets[:-1]
+	component_targets = array('i', [0]) * component_offsets[size]
+	incoming = array('i', [0]) * size
+	
+	for node in range(len(nodes)):
+		node_c = membership[node]
+		
+		for edge in range(offsets[node], offsets[node + 1]):
+			successor_c = membership[targets[edge]]
+			
+			if successor_c != node_c:
+				component_targets[fill[node_c]] = successor_c
+				fill[node_c] += 1
+				incoming[successor_c] += 1
+	
+	# Then sort it, in the manner of `topological_sort`.
+	
+	result = []
+	ready = [i for i in range(size) if incoming[i] == 0]
+	
+	while ready:
+		i = ready.pop(-1)
+		result.append(tuple(nodes[node] for node in components[i]))
+		
+		for edge in range(component_offsets[i], component_offsets[i + 1]):
+			successor_c = component_targets[edge]
+			incoming[successor_c] -= 1
+			
+			if incoming[successor_c] == 0:
+				ready.append(successor_c)
+	
+	return result
@@ -0,0 +1,22 @@
+"""Runtime type checking of the public interfaces of this package, using typeguard.
+
+Checking is enabled by default, and is selected once, at import time. For production use, where the overhead of
+checking every call is undesirable, checking is disabled (and typeguard is not imported) if the interpreter is running
+with optimizations enabled (`python -O`) or the `MARROW_PACKAGE_UNCHECKED` environment variable is set to a true value
+such as `1` or `yes`. The decorated functions are then used directly, without any wrapper.
+"""
+
+import os
+
+
+CHECKED: bool = __debug__ and os.environ.get('MARROW_PACKAGE_UNCHECKED', '').lower() in ('', '0', 'false', 'no', 'off')
+
+
+if CHECKED:
+	from typeguard import typechecked
+
+else:
+	def typechecked(func):
+		"""Return the function given, unaltered; runtime type checking has been disabled."""
+		
+		return func
@@ -1,4 +1,7 @@
 import os
+import sys
+
+import pytest
 
 
 class Mine:
@@ -7,3 +10,29 @@ class Mine:
 
 if not hasattr(Mine.canary, 'im_class') and not hasattr(Mine.canary, '__qualname__'):
 	os.environ['CANARY'] = "DEAD"
+
+
+@pytest.fixture
+def plugin_path(tmp_path, monkeypatch):
+	"""Install a throwaway distribution advertising plugins within the `marrow.package.test` namespace.
+	
+	Of these, `sample` and `other` are importable and `broken` is not. None are imported until requested.
+	"""
+	
+	metadata = tmp_path / 'throwaway-1.0.dist-info'
+	metadata.mkdir()
+	(metadata / 'METADATA').write_text("Metadata-Version: 2.1\nName: throwaway\nVersion: 1.0\n")
+	(metadata / 'entry_points.txt').write_text("[marrow.package.test]\nsample = throwaway:Sample\n"
+			"broken = throwaway_broken:Broken\nother = throwaway:Other\n")
+	(tmp_path / 'throwaway.py').write_text("class Sample: pass\nclass Other: pass\n")
+	(tmp_path / 'throwaway_broken.py').write_text("raise ImportError('Nope.')\n")
+	
+	for module in ('throwaway', 'throwaway_broken'):
+		monkeypatch.delitem(sys.modules, module, raising=False)
+	
+	monkeypatch.syspath_prepend(str(tmp_path))
+	
+	yield tmp_path
+	
+	for module in ('throwaway', 'throwaway_broken'):
+		sys.modules.pop(module, None)
@@ -1,7 +1,15 @@
+import gc
+import sys
+from importlib import reload
+from threading import Thread
+from time import sleep
+
 import pytest
 
+from test import helper
 from marrow.package import load, name, traverse
-from marrow.package.cache import PluginCache
+from marrow.package import cache as module
+from marrow.package.cache import BoundedPluginCache, CacheInfo, CachingLoader, PluginCache, PluginCacheInfo
 
 
 class TestCache:
@@ -28,3 +36,421 @@ class TestCache:
 		assert len(cache) == 1
 		assert 'load' in cache
 
+
+
+@pytest.fixture
+def loads(monkeypatch):
+	"""Record each plugin name actually loaded by a PluginCache, slowly, to widen any window for races."""
+	
+	names = []
+	
+	def counting(name, namespace):
+		names.append(name)
+		sleep(0.01)
+		return load(name, namespace)
+	
+	monkeypatch.setattr(module, 'load', counting)
+	
+	return names
+
+
+@pytest.fixture
+def clock(monkeypatch):
+	now = [1000.0]
+	monkeypatch.setattr(module, 'monotonic', lambda: now[0])
+	return now
+
+
+class TestPluginCacheConcurrency:
+	def test_loaded_once(self, loads):
+		cache = PluginCache('marrow.package.sample')
+		results = []
+		threads = [Thread(target=lambda: results.append(cache['load'])) for i in range(8)]
+		
+		for thread in threads: thread.start()
+		for thread in threads: thread.join()
+		
+		assert results == [load] * 8
+		assert loads == ['load']
+		assert not cache._locks
+	
+	def test_plugins_loaded_independently(self, loads):
+		cache = PluginCache('marrow.package.sample')
+		threads = [Thread(target=lambda name=name: cache[name]) for name in ('load', 'name', 'traverse')]
+		
+		for thread in threads: thread.start()
+		for thread in threads: thread.join()
+		
+		assert sorted(loads) == ['load', 'name', 'traverse']
+		assert len(cache) == 3
+
+
+class TestPluginCacheMissing:
+	def test_missing_remembered(self, loads, clock):
+		cache = PluginCache('marrow.package.sample')
+		
+		for i in range(3):
+			with pytest.raises(LookupError, match='Unknown plugin'):
+				cache['missing']
+		
+		assert loads == ['missing']
+		assert 'missing' not in cache
+	
+	def test_missing_expires(self, loads, clock):
+		cache = PluginCache('marrow.package.sample', ttl=5)
+		
+		with pytest.raises(LookupError):
+			cache['missing']
+		
+		clock[0] += 5
+		
+		with pytest.raises(LookupError):
+			cache['missing']
+		
+		assert loads == ['missing', 'missing']
+	
+	def test_missing_not_remembered(self, loads):
+		cache = PluginCache('marrow.package.sample', ttl=0)
+		
+		for i in range(2):
+			with pytest.raises(LookupError):
+				cache['missing']
+		
+		assert loads == ['missing', 'missing']
+		assert not cache._missing
+	
+	def test_attribute_access(self, clock):
+		cache = PluginCache('marrow.package.sample')
+		
+		for i in range(2):
+			with pytest.raises(LookupError):
+				cache.missing
+
+
+class TestPluginCacheRefresh:
+	def test_refresh_all(self, loads, clock):
+		cache = PluginCache('marrow.package.sample')
+		cache['load']
+		
+		with pytest.raises(LookupError):
+			cache['missing']
+		
+		cache.refresh()
+		
+		assert len(cache) == 0
+		assert not cache._missing
+		assert cache['load'] is load
+		assert loads == ['load', 'missing', 'load']
+	
+	def test_refresh_one(self, clock):
+		cache = PluginCache('marrow.package.sample')
+		cache['load'], cache['name']
+		
+		with pytest.raises(LookupError):
+			cache['missing']
+		
+		cache.refresh('load')
+		
+		assert list(cache) == ['name']
+		assert 'missing' in cache._missing
+		
+		cache.refresh('missing')
+		assert not cache._missing
+	
+	def test_refresh_finds_installed(self, plugin_path):
+		cache = PluginCache('marrow.package.test')
+		
+		with pytest.raises(LookupError):
+			cache['late']
+		
+		metadata = plugin_path / 'throwaway-1.0.dist-info' / 'entry_points.txt'
+		metadata.write_text(metadata.read_text() + "late = throwaway:Other\n")
+		
+		with pytest.raises(LookupError):
+			cache['late']
+		
+		cache.refresh()
+		assert cache['late'] is sys.modules['throwaway'].Other
+
+@pytest.fixture
+def transient(tmp_path, monkeypatch):
+	"""A namespace of plugins loaded from a module which is then forgotten, so that only the cache references them."""
+	
+	metadata = tmp_path / 'transient-1.0.dist-info'
+	metadata.mkdir()
+	(metadata / 'METADATA').write_text("Metadata-Version: 2.1\nName: transient\nVersion: 1.0\n")
+	(metadata / 'entry_points.txt').write_text("[marrow.package.transient]\nfirst = transient:First\n"
+			"second = transient:Second\nthird = transient:Third\nconstant = transient:CONSTANT\n")
+	(tmp_path / 'transient.py').write_text("class First: pass\nclass Second: pass\nclass Third: pass\nCONSTANT = 27\n")
+	
+	monkeypatch.syspath_prepend(str(tmp_path))
+	
+	def forget(name, namespace):
+		value = load(name, namespace)
+		sys.modules.pop('transient', None)
+		return value
+	
+	monkeypatch.setattr(module, 'load', forget)
+	
+	return 'marrow.package.transient'
+
+
+class TestBoundedPluginCache:
+	def test_default_unbounded(self):
+		assert type(PluginCache('marrow.package.sample')) is PluginCache
+		assert type(PluginCache('marrow.package.sample', maxsize=2)) is BoundedPluginCache
+		assert type(PluginCache('marrow.package.sample', weak=True)) is BoundedPluginCache
+	
+	def test_invalid_size(self):
+		with pytest.raises(ValueError):
+			PluginCache('marrow.package.sample', maxsize=0)
+	
+	def test_access(self):
+		cache = PluginCache('marrow.package.sample', maxsize=2)
+		
+		assert cache['load'] is load
+		assert cache.traverse is traverse
+		assert 'load' in cache
+		assert len(cache) == 2
+		
+		with pytest.raises(LookupError):
+			cache.missing
+	
+	def test_least_recently_used_evicted(self, loads):
+		cache = PluginCache('marrow.package.sample', maxsize=2)
+		
+		cache['load'], cache['name'], cache['load'], cache['traverse']
+		
+		assert list(cache) == ['load', 'traverse']
+		assert 'name' not in cache
+		assert cache.info() == PluginCacheInfo(hits=1, misses=3, evictions=1, collected=0, maxsize=2, currsize=2)
+		
+		assert cache['name'] is name
+		assert loads == ['load', 'name', 'traverse', 'name']
+	
+	def test_weak_collected(self, transient):
+		cache = PluginCache(transient, weak=True)
+		
+		first = cache['first']
+		assert 'first' in cache
+		
+		del first
+		gc.collect()
+		
+		assert 'first' not in cache
+		assert len(cache) == 0
+		assert cache.info().collected == 1
+	
+	def test_weak_retained_while_used(self, loads):
+		cache = PluginCache('marrow.package.sample', weak=True)
+		
+		assert cache['load'] is load  # Referenced by modules, so never collected.
+		gc.collect()
+		assert cache['load'] is load
+		
+		assert loads == ['load']
+		assert cache.info().hits == 1
+	
+	def test_weak_unreferenceable_retained(self, transient):
+		cache = PluginCache(transient, weak=True)
+		
+		assert cache['constant'] == 27
+		gc.collect()
+		assert cache.get('constant') == 27
+	
+	def test_weak_unreferenceable_bounded(self):
+		cache = PluginCache('marrow.package.sample', maxsize=2, weak=True)
+		
+		for i in range(10):
+			cache[str(i)] = (i, )
+		
+		assert list(cache) == ['8', '9']
+		assert cache.info().evictions == 8
+		assert cache.info().currsize == 2
+	
+	def test_weak_replaces_unreferenceable(self):
+		class Plugin: pass
+		
+		cache = PluginCache('marrow.package.sample', weak=True)
+		plugin = Plugin()
+		
+		cache['plugin'] = (1, )
+		cache['plugin'] = plugin
+		assert cache['plugin'] is plugin
+		
+		cache['plugin'] = (2, )
+		del plugin
+		gc.collect()
+		assert cache['plugin'] == (2, )
+	
+	def test_evicted_revived_while_used(self, transient):
+		cache = PluginCache(transient, maxsize=1, weak=True)
+		
+		first = cache['first']
+		cache['second']
+		
+		assert list(cache._recent) == ['second']
+		assert cache['first'] is first
+		assert list(cache._recent) == ['first']
+		
+		cache['third']
+		gc.collect()
+		
+		assert set(cache) == {'first', 'third'}
+		assert cache.info() == PluginCacheInfo(hits=1, misses=3, evictions=3, collected=1, maxsize=1, currsize=2)
+	
+	def test_refresh(self, loads):
+		cache = PluginCache('marrow.package.sample', maxsize=2)
+		cache['load'], cache['name']
+		
+		cache.refresh('load')
+		assert list(cache) == ['name']
+		
+		cache.refresh()
+		assert len(cache) == 0
+	
+	def test_delete(self):
+		cache = PluginCache('marrow.package.sample', maxsize=2, weak=True)
+		cache['load']
+		
+		del cache['load']
+		assert 'load' not in cache
+		
+		with pytest.raises(KeyError):
+			del cache['load']
+	
+	def test_update_and_setdefault(self):
+		cache = PluginCache('marrow.package.sample', maxsize=2)
+		
+		cache.update(foo=1)
+		assert cache.setdefault('bar', 2) == 2
+		assert cache.setdefault('bar', 3) == 2
+		assert cache.get('foo') == 1
+		
+		cache |= {'baz': 3}
+		assert list(cache) == ['bar', 'baz']
+		assert cache.info().evictions == 1
+	
+	def test_popitem(self):
+		cache = PluginCache('marrow.package.sample', maxsize=2)
+		cache['load'], cache['name']
+		
+		assert cache.popitem() == ('name', name)
+		assert cache.popitem() == ('load', load)
+		
+		with pytest.raises(KeyError):
+			cache.popitem()
+	
+	def test_comparison_and_copy(self):
+		cache = PluginCache('marrow.package.sample', maxsize=2)
+		cache['load']
+		
+		assert cache == {'load': load}
+		assert cache != {}
+		assert cache.copy() == dict(cache) == {'load': load}
+		assert type(cache.copy()) is dict
+		assert (cache | {'x': 1}) == {'load': load, 'x': 1}
+		
+		other = PluginCache('marrow.package.sample', weak=True)
+		other['load']
+		assert cache == other
+	
+	def test_loaded_once(self, loads):
+		cache = PluginCache('marrow.package.sample', maxsize=1, weak=True)
+		threads = [Thread(target=lambda: cache['load']) for i in range(8)]
+		
+		for thread in threads: thread.start()
+		for thread in threads: thread.join()
+		
+		assert loads == ['load']
+
+
+class TestCachingLoader:
+	def test_loads_expected_objects(self):
+		loader = CachingLoader()
+		assert loader('test.helper:Example') is helper.Example
+		assert loader('traverse', 'marrow.package.sample') is traverse
+	
+	def test_caches_hits(self):
+		loader = CachingLoader()
+		
+		assert loader('test.helper:Example.Pandora') is helper.Example.Pandora
+		assert loader('test.helper:Example.Pandora') is helper.Example.Pandora
+		assert loader.info() == CacheInfo(hits=1, misses=1, maxsize=1024, currsize=1)
+	
+	def test_options_are_keyed(self):
+		loader = CachingLoader()
+		
+		assert loader('test.helper:instance.instance') == helper.instance.instance
+		assert loader('test.helper:instance.instance', executable=True) is helper.instance
+		assert len(loader) == 2
+	
+	def test_negative_caching(self):
+		loader = CachingLoader()
+		
+		assert loader('foo.bar:baz', default="hi") == "hi"
+		assert loader('foo.bar:baz', default=27) == 27
+		assert loader.hits == 1
+		
+		with pytest.raises(ImportError):
+			loader('foo.bar:baz')
+	
+	def test_unresolvable_without_default(self):
+		loader = CachingLoader()
+		
+		with pytest.raises(LookupError):
+			loader('test.helper:Example.bogus')
+		
+		assert len(loader) == 0
+	
+	def test_bounded(self):
+		loader = CachingLoader(2)
+		
+		loader('test.helper:Example')
+		loader('test.helper:bare')
+		loader('test.helper:Example')  # Refresh; now most recently used.
+		loader('test.helper:instance')
+		
+		assert len(loader) == 2
+		loader('test.helper:Example')
+		assert loader.info().hits == 2
+	
+	def test_invalid_size(self):
+		with pytest.raises(ValueError):
+			CachingLoader(0)
+	
+	def test_explicit_invalidation(self):
+		loader = CachingLoader()
+		loader('test.helper:Example')
+		loader('test.helper:bare')
+		
+		loader.invalidate('test.helper:bare')
+		assert len(loader) == 1
+		
+		loader.invalidate()
+		assert len(loader) == 0
+	
+	def test_module_replacement_invalidates(self, tmp_path, monkeypatch):
+		(tmp_path / 'replaceable.py').write_text("class Example: pass\n")
+		monkeypatch.syspath_prepend(str(tmp_path))
+		
+		loader = CachingLoader()
+		original = loader('replaceable:Example')
+		
+		del sys.modules['replaceable']
+		
+		assert loader('replaceable:Example') is not original
+		assert loader.info().misses == 2
+	
+	def test_reload_invalidates(self, tmp_path, monkeypatch):
+		(tmp_path / 'reloadable.py').write_text("class Example: pass\n")
+		monkeypatch.syspath_prepend(str(tmp_path))
+		monkeypatch.delitem(sys.modules, 'reloadable', raising=False)
+		
+		loader = CachingLoader()
+		original = loader('reloadable:Example')
+		
+		reload(sys.modules['reloadable'])
+		
+		assert loader('reloadable:Example') is not original
+		assert loader.info().misses == 2
@@ -3,7 +3,8 @@ from unittest import TestCase
 
 import pytest
 
-from marrow.package.canonical import name
+from marrow.package.canonical import _names, name
+from marrow.package.index import entry_points
 
 xfail_qualname = pytest.mark.xfail(
 		not hasattr(helper.Example, '__qualname__'),
@@ -84,4 +85,21 @@ class TestResolver(TestCase):
 	
 	def test__resolve__plugin_direct(self):
 		assert name(TestCase, 'marrow.package.sample', True) == 'unittest.case:TestCase'
-
+	
+	def test__resolve__is_memoized(self):
+		name(helper.Example.Pandora)
+		assert _names[helper.Example.Pandora] == 'test.helper:Example.Pandora'
+	
+	def test__resolve__bound_method_memoized_by_function(self):
+		name(helper.instance.instance)
+		assert _names[helper.Example.instance] == 'test.helper:Example.instance'
+	
+	def test__resolve__plugin_reverse_index(self):
+		assert entry_points.reverse('marrow.package.sample')['marrow.package.loader:traverse'] == 'traverse'
+		assert not entry_points.reverse('marrow.package.bogus')
+	
+	def test__resolve__plugin_reverse_index_invalidated(self):
+		mapping = entry_points.reverse('marrow.package.sample')
+		assert entry_points.reverse('marrow.package.sample') is mapping
+		entry_points.invalidate()
+		assert entry_points.reverse('marrow.package.sample') is not mapping
@@ -0,0 +1,291 @@
+import sys
+from importlib import import_module
+
+from test import helper
+
+import pytest
+
+from marrow.package.disport import Importer
+
+
+class Counting(Importer):
+	"""Record each reference the importer attempts to import."""
+	
+	__slots__ = ('attempts', )
+	
+	def __init__(self, *args, **kw):
+		self.attempts = []
+		super().__init__(*args, **kw)
+	
+	def _reference(self, target, namespace=None):
+		self.attempts.append(target)
+		return super()._reference(target, namespace)
+
+
+class TestImporter:
+	def test_unredirected(self):
+		assert Importer()('test.helper:Example') is helper.Example
+	
+	def test_unredirected_default(self):
+		assert Importer()('test.missing:Example', None) is None
+	
+	def test_unredirected_failure(self):
+		with pytest.raises(ImportError):
+			Importer()('test.missing:Example')
+	
+	def test_prefix(self):
+		importer = Importer([('theme', 'test.helper:Example')])
+		assert importer('theme.Pandora.Box') is helper.Example.Pandora.Box
+	
+	def test_exact(self):
+		importer = Importer([('theme:page', 'test.helper:Example')])
+		assert importer('theme:page') is helper.Example
+	
+	def test_segment_aware(self):
+		importer = Importer([('test.help', 'test.missing')])
+		
+		assert importer.candidates('test.helper:Example') == []
+		assert importer.candidates('test.help:Example') == ['test.missing:Example']
+		assert importer('test.helper:Example') is helper.Example
+	
+	def test_longest_prefix_first(self):
+		importer = Importer([('theme.page', 'test.helper:Example.Pandora'), ('theme', 'test.helper:Example')])
+		
+		assert importer.candidates('theme.page.Box') == ['test.helper:Example.Pandora.Box', 'test.helper:Example.page.Box']
+		assert importer('theme.page.Box') is helper.Example.Pandora.Box
+	
+	def test_latest_of_same_prefix_first(self):
+		importer = Importer([('theme', 'test.helper:Example'), ('theme', 'test.helper:Example.Pandora')])
+		
+		assert importer.candidates('theme.nested') == ['test.helper:Example.Pandora.nested', 'test.helper:Example.nested']
+		assert importer('theme.nested') is helper.Example.Pandora.nested
+	
+	def test_failed_candidate_falls_through(self):
+		importer = Importer([('theme', 'test.helper:Example'), ('theme', 'test.missing')])
+		assert importer('theme.Pandora') is helper.Example.Pandora
+	
+	def test_fallback(self):
+		importer = Importer([('test.helper:Example', 'test.missing:Example')])
+		assert importer('test.helper:Example.Pandora') is helper.Example.Pandora
+
+
+class TestImporterCache:
+	def test_resolution_cached(self):
+		importer = Counting([('theme', 'test.missing'), ('theme', 'test.helper:Example')])
+		
+		assert importer('theme.Pandora') is helper.Example.Pandora
+		assert importer.attempts == ['test.helper:Example.Pandora']
+		
+		assert importer('theme.Pandora') is helper.Example.Pandora
+		assert importer.attempts == ['test.helper:Example.Pandora']
+	
+	def test_failure_cached(self):
+		importer = Counting([('theme', 'test.helper:Example'), ('theme', 'test.missing')])
+		
+		assert importer('theme.Pandora') is helper.Example.Pandora
+		assert importer('theme.instance') is helper.Example.instance
+		assert importer.attempts == ['test.missing.Pandora', 'test.helper:Example.Pandora', 'test.missing.instance',
+				'test.helper:Example.instance']
+		
+		importer.redirect('other', 'test')
+		assert importer('theme.Box', None) is None
+		assert 'test.missing.Box' in importer.attempts
+		assert importer.attempts.count('test.missing.Pandora') == 1
+	
+	def test_redirect_invalidates_affected(self):
+		importer = Importer([('theme', 'test.helper:Example')])
+		
+		assert importer('theme.Pandora') is helper.Example.Pandora
+		assert importer('theme.instance') is helper.Example.instance
+		assert importer('other.thing', None) is None
+		
+		importer.redirect('theme.Pandora', 'test.helper:Example.Pandora.Box')
+		
+		assert set(importer._resolved) == {'theme.instance'}
+		assert importer('theme.Pandora') is helper.Example.Pandora.Box
+	
+	def test_redirect_invalidates_fallback(self):
+		importer = Importer()
+		
+		assert importer('test.helper:Example') is helper.Example
+		importer.redirect('test.helper:Example', 'test.helper:Example.Pandora')
+		assert importer('test.helper:Example') is helper.Example.Pandora
+	
+	def test_invalidate(self):
+		importer = Counting([('theme', 'test.missing')])
+		
+		assert importer('theme', None) is None
+		importer.invalidate()
+		assert importer('theme', None) is None
+		
+		assert importer.attempts.count('test.missing') == 2
+
+
+@pytest.fixture
+def installed():
+	importer = Importer().install()
+	before = set(sys.modules)
+	
+	yield importer
+	
+	importer.uninstall()
+	
+	for name in set(sys.modules) - before:
+		del sys.modules[name]
+
+
+class TestImporterFinder:
+	def test_install(self):
+		importer = Importer().install()
+		importer.install()
+		
+		assert sys.meta_path.count(importer) == 1
+		assert sys.meta_path[0] is importer
+		
+		importer.uninstall()
+		assert importer not in sys.meta_path
+	
+	def test_import_statement(self, installed):
+		installed.redirect('disport_sample', 'test.helper')
+		
+		import disport_sample
+		
+		assert disport_sample is helper
+		assert sys.modules['disport_sample'] is helper
+	
+	def test_submodule(self, installed):
+		installed.redirect('test.overridden', 'test.helper')
+		
+		from test import overridden
+		
+		assert overridden is helper
+	
+	def test_package(self, installed):
+		installed.redirect('disport_skin', 'test')
+		
+		import disport_skin.helper
+		
+		assert disport_skin.helper is helper
+	
+	def test_fallback(self, installed):
+		installed.redirect('test.helper', 'test.missing')
+		
+		from test import helper as imported
+		
+		assert imported is helper
+		assert installed.find_spec('test.helper') is None
+	
+	def test_unredirected(self, installed):
+		assert installed.find_spec('json') is None
+		assert 'json' not in installed._modules
+	
+	def test_unchecked(self, installed, monkeypatch):
+		def checked(self, target):
+			raise AssertionError("The finder must not use the type checked interface.")
+		
+		monkeypatch.setattr(Importer, 'candidates', checked)
+		installed.redirect('disport_sample', 'test.helper')
+		
+		assert installed.find_spec('json') is None
+		assert installed.find_spec('disport_sample').loader.target == 'test.helper'
+	
+	def test_object_redirects_ignored(self, installed):
+		installed.redirect('disport_object', 'test.helper:Example')
+		
+		with pytest.raises(ImportError):
+			import_module('disport_object')
+	
+	def test_cyclic(self, installed):
+		installed.redirect('disport_ping', 'disport_pong')
+		installed.redirect('disport_pong', 'disport_ping')
+		
+		with pytest.raises(ImportError):
+			import_module('disport_ping')
+	
+	def test_resolution_cached(self, installed):
+		installed.redirect('disport_cached', 'test.missing')
+		installed.redirect('disport_cached', 'test.helper')
+		
+		assert installed.find_spec('disport_cached').loader.target == 'test.helper'
+		assert installed._modules == {'disport_cached': 'test.helper'}
+		
+		installed.redirect('disport_cached', 'json')
+		assert 'disport_cached' not in installed._modules
+		assert installed.find_spec('disport_cached').loader.target == 'json'
+	
+	def test_invalidate_caches(self, installed):
+		from importlib import invalidate_caches
+		
+		installed.redirect('disport_cached', 'test.missing')
+		assert installed.find_spec('disport_cached') is None
+		assert installed._failed
+		
+		invalidate_caches()
+		
+		assert not installed._failed
+		assert not installed._modules
+
+
+@pytest.fixture
+def theme(plugin_path):
+	"""A module overriding the `sample` plugin of the throwaway distribution, but not `other`."""
+	
+	(plugin_path / 'throwaway_theme.py').write_text("class Sample: pass\n")
+	
+	yield plugin_path
+	
+	sys.modules.pop('throwaway_theme', None)
+
+
+class TestImporterPlugins:
+	def test_unredirected(self, plugin_path):
+		assert Importer(namespace='marrow.package.test')('sample') is sys.modules['throwaway'].Sample
+	
+	def test_unknown(self, plugin_path):
+		with pytest.raises(LookupError):
+			Importer(namespace='marrow.package.test')('missing')
+	
+	def test_redirected(self, theme):
+		importer = Importer([('sample', 'throwaway_theme')], namespace='marrow.package.test')
+		assert importer('sample') is sys.modules['throwaway_theme'].Sample
+	
+	def test_fallback(self, theme):
+		importer = Importer([('other', 'throwaway_theme')], namespace='marrow.package.test')
+		assert importer('other') is sys.modules['throwaway'].Other
+	
+	def test_whole_name_only(self, theme):
+		importer = Importer([('sam', 'throwaway_theme')], namespace='marrow.package.test')
+		assert importer('sample') is sys.modules['throwaway'].Sample
+	
+	def test_latest_first(self, theme):
+		importer = Counting([('sample', 'throwaway_theme'), ('sample', 'throwaway_missing')],
+				namespace='marrow.package.test')
+		
+		assert importer('sample') is sys.modules['throwaway_theme'].Sample
+		assert importer.attempts == ['throwaway_missing:Sample', 'throwaway_theme:Sample']
+	
+	def test_resolution_cached(self, theme):
+		importer = Counting([('sample', 'throwaway_theme')], namespace='marrow.package.test')
+		
+		importer('sample')
+		importer('sample')
+		assert importer.attempts == ['throwaway_theme:Sample']
+		
+		importer.redirect('other', 'throwaway_theme')
+		importer('sample')
+		assert importer.attempts == ['throwaway_theme:Sample']
+		
+		importer.redirect('sample', 'throwaway')
+		assert importer('sample') is sys.modules['throwaway'].Sample
+	
+	def test_custom_separators(self, theme):
+		importer = Counting([('sample', 'throwaway_theme'), ('sample', 'throwaway_missing')],
+				namespace='marrow.package.test', separators=('.', '#', '/'))
+		
+		assert importer('sample') is sys.modules['throwaway_theme'].Sample
+		assert importer('other') is sys.modules['throwaway'].Other
+		assert importer.attempts == ['throwaway_missing#Sample', 'throwaway_theme#Sample', 'throwaway#Other']
+	
+	def test_object_references_unaffected(self, theme):
+		importer = Importer([('sample', 'throwaway_theme')], namespace='marrow.package.test')
+		assert importer('test.helper:Example') is helper.Example
@@ -1,9 +1,13 @@
+import asyncio
+import sys
+from random import Random
 from unittest import TestCase
+from unittest.mock import patch
 
 import pytest
 
 from marrow.package import load, name
-from marrow.package.host import ExtensionManager
+from marrow.package.host import Barrier, DispatchPlan, ExtensionGraph, ExtensionManager, PluginManager
 
 
 class BadExtension:
@@ -41,6 +45,13 @@ class XExtension:
 	provides = ('x', )
 	excludes = ('a', )
 
+class SExtension:
+	provides = ('s', )
+	uses = ('s', )
+
+class TExtension:
+	needs = ('s', )
+
 
 class TestExtensionManager(TestCase):
 	def test__plugin__access_via_attribute(self):
@@ -104,3 +115,703 @@ class TestExtensionManager(TestCase):
 		
 		with pytest.raises(RuntimeError):
 			manager.order([AExtension(), XExtension()])
+	
+	def test__extension__order_is_cached(self):
+		manager = ExtensionManager('marrow.package.sample')
+		extensions = [AExtension(), BExtension(), DExtension()]
+		
+		first = manager.order(extensions)
+		manager._order = None  # Explodes if the ordering is recalculated.
+		
+		assert manager.order(list(extensions)) == first
+		assert len(manager._orders) == 1
+	
+	def test__extension__cached_order_is_copied(self):
+		manager = ExtensionManager('marrow.package.sample')
+		extensions = [AExtension(), BExtension()]
+		
+		manager.order(extensions).append(None)
+		assert manager.order(extensions) == extensions
+	
+	def test__extension__order_cache_keyed_on_metadata(self):
+		manager = ExtensionManager('marrow.package.sample')
+		extensions = [AExtension(), EExtension()]
+		extensions[1].first = False
+		
+		assert manager.order(extensions) in (extensions, extensions[::-1])
+		
+		extensions[0].needs = ('c', )
+		extensions[1].provides = ('c', )
+		
+		assert manager.order(extensions) == [extensions[1], extensions[0]]
+		assert len(manager._orders) == 2
+	
+	def test__extension__order_cache_cleared_on_registration(self):
+		manager = ExtensionManager('marrow.package.sample')
+		manager.order([AExtension()])
+		manager.register('foo', AExtension())
+		assert not manager._orders
+	
+	def test__extension__order_cache_bounded(self):
+		manager = ExtensionManager('marrow.package.sample')
+		manager.order_cache_size = 2
+		
+		for i in range(4):
+			manager.order([AExtension()])
+		
+		assert len(manager._orders) == 2
+	
+	def test__extension__metadata_read_once(self):
+		manager = ExtensionManager('marrow.package.sample')
+		reads = []
+		
+		class Counted:
+			@property
+			def needs(self):
+				reads.append(self)
+				return ('a', )
+		
+		extensions = [Counted(), AExtension()]
+		assert manager.order(extensions) == extensions[::-1]
+		assert len(reads) == 1
+	
+	def test__extension__graph_linear(self):
+		manager = ExtensionManager('marrow.package.sample')
+		extensions = [EExtension(), FExtension()] + [AExtension() for i in range(100)]
+		dependencies = manager._dependencies(extensions)
+		
+		assert sum(len(requirements) for requirements in dependencies.values()) <= 2 * len(extensions)
+		assert manager.order(extensions)[0] is extensions[0]
+		assert manager.order(extensions)[-1] is extensions[1]
+	
+	def test__extension__layers(self):
+		manager = ExtensionManager('marrow.package.sample')
+		a, b, c, d = AExtension(), BExtension(), CExtension(), DExtension()
+		
+		assert manager.order_layers([d, c, b, a]) == [[a], [c, b], [d]]
+	
+	def test__extension__layers_first_and_last(self):
+		manager = ExtensionManager('marrow.package.sample')
+		a, c, e, f = AExtension(), CExtension(), EExtension(), FExtension()
+		
+		assert manager.order_layers([f, c, a, e]) == [[e], [a], [c], [f]]
+	
+	def test__extension__layers_independent(self):
+		manager = ExtensionManager('marrow.package.sample')
+		a, b, standalone = AExtension(), BExtension(), object()
+		
+		assert manager.order_layers([b, standalone, a]) == [[standalone, a], [b]]
+	
+	def test__extension__layers_circular_need(self):
+		manager = ExtensionManager('marrow.package.sample')
+		
+		with pytest.raises(LookupError):
+			manager.order_layers([AExtension(), GExtension(), HExtension()])
+	
+	def test__extension__layers_self_use(self):
+		manager = ExtensionManager('marrow.package.sample')
+		s, t = SExtension(), TExtension()
+		
+		assert manager.order([t, s]) == [s, t]
+		assert manager.order_layers([t, s]) == [[s], [t]]
+	
+	def test__extension__layers_never_partial(self):
+		manager = ExtensionManager('marrow.package.sample')
+		a, b = AExtension(), BExtension()
+		
+		with patch('marrow.package.host.topological_layers', lambda graph: [[a]]):
+			with pytest.raises(LookupError, match='Unable to order'):
+				manager.order_layers([a, b])
+	
+	def test__extension__layers_cached_and_copied(self):
+		manager = ExtensionManager('marrow.package.sample')
+		extensions = [AExtension(), BExtension()]
+		
+		layers = manager.order_layers(extensions)
+		layers[0].append(None)
+		manager._layers = None  # Explodes if the layering is recalculated.
+		
+		assert manager.order_layers(extensions) == [[extensions[0]], [extensions[1]]]
+		assert manager.order(extensions) == extensions  # Cached independently of the layering.
+
+
+class Hooked:
+	"""An extension recording the start and end of its asynchronous hooks within a shared journal."""
+	
+	def __init__(self, journal, label, provides=(), needs=(), uses=(), fail=False):
+		self.journal = journal
+		self.label = label
+		self.provides = provides
+		self.needs = needs
+		self.uses = uses
+		self.fail = fail
+	
+	async def start(self, delay=0.01):
+		self.journal.append(('+', self.label))
+		await asyncio.sleep(delay)
+		self.journal.append(('-', self.label))
+		
+		if self.fail:
+			raise ValueError(self.label)
+		
+		return self.label
+	
+	stop = start
+
+
+class TestExtensionLifecycle:
+	def test_dependencies_complete_first(self):
+		manager = ExtensionManager('marrow.package.sample')
+		journal = []
+		a = Hooked(journal, 'a', provides=('a', ))
+		b = Hooked(journal, 'b', provides=('b', ), needs=('a', ))
+		c = Hooked(journal, 'c', needs=('a', ))
+		d = Hooked(journal, 'd', needs=('b', ))
+		
+		results = asyncio.run(manager.run('start', config=[d, c, b, a]))
+		
+		assert results == {a: 'a', b: 'b', c: 'c', d: 'd'}
+		assert journal.index(('-', 'a')) < journal.index(('+', 'b'))
+		assert journal.index(('-', 'a')) < journal.index(('+', 'c'))
+		assert journal.index(('-', 'b')) < journal.index(('+', 'd'))
+		assert journal.index(('+', 'c')) < journal.index(('-', 'b'))  # Siblings overlap.
+	
+	def test_reverse(self):
+		manager = ExtensionManager('marrow.package.sample')
+		journal = []
+		a = Hooked(journal, 'a', provides=('a', ))
+		b = Hooked(journal, 'b', needs=('a', ))
+		
+		asyncio.run(manager.run('stop', config=[a, b], reverse=True))
+		
+		assert journal == [('+', 'b'), ('-', 'b'), ('+', 'a'), ('-', 'a')]
+	
+	def test_self_use_completes(self):
+		manager = ExtensionManager('marrow.package.sample')
+		journal = []
+		s = Hooked(journal, 's', provides=('s', ), uses=('s', ))
+		t = Hooked(journal, 't', needs=('s', ))
+		
+		async def bounded():
+			return await asyncio.wait_for(manager.run('start', config=[t, s]), 2)  # Deadlocked if waiting on itself.
+		
+		assert asyncio.run(bounded()) == {s: 's', t: 't'}
+		assert journal.index(('-', 's')) < journal.index(('+', 't'))
+	
+	def test_arguments_and_plain_hooks(self):
+		manager = ExtensionManager('marrow.package.sample')
+		journal = []
+		a = Hooked(journal, 'a', provides=('a', ))
+		a.prepare = lambda value: value * 2
+		b = AExtension()  # Lacks the hook entirely.
+		
+		assert asyncio.run(manager.run('prepare', 21, config=[a, b])) == {a: 42, b: None}
+		assert asyncio.run(manager.run('start', config=[a], delay=0)) == {a: 'a'}
+	
+	def test_bounded_concurrency(self):
+		manager = ExtensionManager('marrow.package.sample')
+		journal = []
+		extensions = [Hooked(journal, i) for i in range(6)]
+		active = peak = 0
+		
+		for ext in extensions:
+			async def start(ext=ext):
+				nonlocal active, peak
+				active += 1
+				peak = max(peak, active)
+				await asyncio.sleep(0.01)
+				active -= 1
+			
+			ext.start = start
+		
+		asyncio.run(manager.run('start', config=extensions, concurrency=2))
+		assert peak == 2
+		
+		peak = 0
+		asyncio.run(manager.run('start', config=extensions))
+		assert peak == 6
+	
+	def test_failure_skips_dependents(self):
+		manager = ExtensionManager('marrow.package.sample')
+		journal = []
+		a = Hooked(journal, 'a', provides=('a', ), fail=True)
+		b = Hooked(journal, 'b', needs=('a', ))
+		c = Hooked(journal, 'c')
+		
+		with pytest.raises(ValueError, match='a'):
+			asyncio.run(manager.run('start', config=[a, b, c]))
+		
+		assert ('+', 'b') not in journal
+		assert ('-', 'c') in journal
+	
+	def test_first_and_last(self):
+		manager = ExtensionManager('marrow.package.sample')
+		journal = []
+		a, b, c = Hooked(journal, 'a'), Hooked(journal, 'b'), Hooked(journal, 'c')
+		a.first = True
+		c.last = True
+		
+		assert list(asyncio.run(manager.run('start', config=[c, b, a]))) == [a, b, c]
+		assert journal == [('+', 'a'), ('-', 'a'), ('+', 'b'), ('-', 'b'), ('+', 'c'), ('-', 'c')]
+	
+	def test_circular_need(self):
+		manager = ExtensionManager('marrow.package.sample')
+		
+		with pytest.raises(LookupError):
+			asyncio.run(manager.run('start', config=[AExtension(), GExtension(), HExtension()]))
+
+
+class Recorder:
+	def __init__(self, label, provides=(), needs=()):
+		self.label = label
+		self.provides = provides
+		self.needs = needs
+	
+	def prepare(self, journal):
+		journal.append(self.label)
+		return self.label
+
+
+class TestDispatchPlan:
+	def extensions(self):
+		a = Recorder('a', provides=('a', ))
+		b = Recorder('b', needs=('a', ))
+		return a, b, AExtension()
+	
+	def test_hook_callbacks(self):
+		a, b, c = self.extensions()
+		plan = ExtensionManager('marrow.package.sample').plan([b, c, a])
+		
+		assert plan.extensions.index(a) < plan.extensions.index(b)
+		assert plan['prepare'] == (a.prepare, b.prepare)
+		assert plan.reverse('prepare') == (b.prepare, a.prepare)
+		assert plan['missing'] == ()
+	
+	def test_invocation(self):
+		a, b, c = self.extensions()
+		plan = DispatchPlan([a, c, b])
+		journal = []
+		
+		assert plan('prepare', journal) is None
+		plan.call_reverse('prepare', journal)
+		assert journal == ['a', 'b', 'b', 'a']
+		
+		assert plan.collect('prepare', journal) == ['a', 'b']
+		assert plan.collect_reverse('prepare', journal) == ['b', 'a']
+	
+	def test_resolved_once(self):
+		a, b, c = self.extensions()
+		plan = DispatchPlan([a, b, c], hooks=('prepare', ))
+		a.prepare = None
+		
+		assert len(plan['prepare']) == 2
+	
+	def test_cached_per_ordering(self):
+		manager = ExtensionManager('marrow.package.sample')
+		extensions = self.extensions()
+		plan = manager.plan(extensions, hooks=('prepare', ))
+		
+		assert manager.plan(list(extensions)) is plan
+		assert manager.plan(extensions[:2]) is not plan
+		
+		manager.register('foo', AExtension())
+		assert manager.plan(extensions) is not plan
+
+
+class Flagged:
+	def __init__(self, label, **flags):
+		self.label = label
+		self.__dict__.update(flags)
+	
+	def __repr__(self):
+		return self.label
+
+
+def assert_valid(graph, extensions, manager=None):
+	"""Verify an incrementally maintained order against the full dependency graph of the same extensions."""
+	
+	ordered = graph.order()
+	assert sorted(ordered, key=id) == sorted(set(extensions), key=id)
+	
+	position = {ext: i for i, ext in enumerate(ordered)}
+	dependencies = (manager or ExtensionManager('marrow.package.sample'))._dependencies(list(extensions))
+	
+	def expand(requirements):  # Barrier nodes stand in for the extensions they depend upon.
+		for requirement in requirements:
+			if requirement.__class__ is Barrier:
+				yield from expand(dependencies[requirement])
+			else:
+				yield requirement
+	
+	for ext, requirements in dependencies.items():
+		if ext.__class__ is Barrier: continue
+		
+		for requirement in expand(requirements):
+			assert requirement is ext or position[requirement] < position[ext], (requirement, ext)
+
+
+class TestExtensionGraph:
+	def generate(self, count, rng):
+		extensions = []
+		
+		for i in range(count):
+			uses = tuple('f' + str(rng.randrange(i)) for j in range(rng.randrange(3))) if i else ()
+			extensions.append(Flagged('e' + str(i), provides=('f' + str(i), ), uses=uses))
+		
+		extensions[0].first = True  # Uses nothing.
+		extensions[-1].last = True  # Used by nothing.
+		rng.shuffle(extensions)
+		
+		return extensions
+	
+	@pytest.mark.parametrize('seed', range(3))
+	def test_random_additions_and_removals(self, seed):
+		rng = Random(seed)
+		extensions = self.generate(40, rng)
+		manager = ExtensionManager('marrow.package.sample')
+		graph = ExtensionGraph()
+		present = []
+		
+		for ext in extensions:
+			graph.add(ext)
+			present.append(ext)
+			assert_valid(graph, present, manager)
+		
+		for i in range(20):
+			ext = present.pop(rng.randrange(len(present)))
+			graph.remove(ext)
+			assert ext not in graph
+			assert_valid(graph, present, manager)
+			
+			if i % 3 == 0:
+				graph.add(ext)
+				present.append(ext)
+				assert_valid(graph, present, manager)
+	
+	def test_first_and_last(self):
+		a, c, e, f = AExtension(), CExtension(), EExtension(), FExtension()
+		graph = ExtensionGraph([f, c, a, e])
+		
+		assert graph.order() == [e, a, c, f]
+		assert len(graph) == 4
+		assert list(graph) == [e, a, c, f]
+	
+	def test_unmet_needs(self):
+		graph = ExtensionGraph([BExtension()])
+		
+		with pytest.raises(LookupError):
+			graph.order()
+		
+		graph.add(AExtension())
+		assert len(graph.order()) == 2
+	
+	def test_duplicate(self):
+		a = AExtension()
+		graph = ExtensionGraph([a, a])
+		
+		with pytest.raises(ValueError):
+			graph.add(a)
+	
+	def test_conflict_leaves_graph_unchanged(self):
+		a, x = AExtension(), XExtension()
+		graph = ExtensionGraph([a])
+		
+		with pytest.raises(RuntimeError):
+			graph.add(x)
+		
+		assert graph.order() == [a]
+		assert x not in graph
+	
+	def test_cycle_leaves_graph_unchanged(self):
+		a, b, c = Flagged('a', provides=('a', )), Flagged('b', provides=('b', ), needs=('a', )), \
+				Flagged('c', provides=('c', ), needs=('b', ))
+		graph = ExtensionGraph([a, b, c])
+		cyclic = Flagged('d', provides=('a', ), needs=('c', ))  # Replaces the provider of a feature b needs.
+		
+		with pytest.raises(LookupError, match='Circular'):
+			graph.add(cyclic)
+		
+		assert cyclic not in graph
+		assert graph.order() == [a, b, c]
+		assert_valid(graph, [a, b, c])
+	
+	def test_latest_provider_wins(self):
+		a1, a2 = Flagged('a1', provides=('a', )), Flagged('a2', provides=('a', ))
+		b = Flagged('b', needs=('a', ))
+		graph = ExtensionGraph([b, a1, a2])
+		
+		assert graph.order().index(a2) < graph.order().index(b)
+		assert a1 not in graph._predecessors[b]
+		
+		graph.remove(a2)
+		assert_valid(graph, [b, a1])
+		assert graph.order().index(a1) < graph.order().index(b)
+	
+	def test_removal_introducing_cycle_is_undone(self):
+		a1 = Flagged('a1', provides=('a', ), uses=('b', ))
+		b = Flagged('b', provides=('b', ), needs=('a', ))
+		a2 = Flagged('a2', provides=('a', ))
+		graph = ExtensionGraph([a1, a2, b])
+		before = graph.order()
+		
+		with pytest.raises(LookupError):
+			graph.remove(a2)  # The need for a would fall back to a1, which uses b.
+		
+		assert a2 in graph
+		assert graph.order() == before
+		
+		graph.remove(b)
+		graph.remove(a2)
+		assert graph.order() == [a1]
+	
+	def test_superseded_provider_not_cyclic(self):
+		a = Flagged('a', provides=('a', ), needs=('b', ))
+		b = Flagged('b', provides=('b', ), uses=('a', ))  # Cyclic until a2 supersedes a as the provider of a.
+		a2 = Flagged('a2', provides=('a', ))
+		
+		assert ExtensionGraph([a, b, a2]).order() == ExtensionManager('marrow.package.sample').order([a, b, a2])
+		
+		manager = ExtensionManager('marrow.package.sample')
+		manager.register('a', a)
+		manager.register('b', b)  # Discards the graph, cyclic at this point.
+		manager.register('a2', a2)
+		assert_valid(manager.graph, manager.plugins, manager)
+	
+	@pytest.mark.parametrize('seed', range(3))
+	def test_random_sets_match_manager(self, seed):
+		rng = Random(seed)
+		manager = ExtensionManager('marrow.package.sample')
+		features = ['f' + str(i) for i in range(5)]
+		
+		def acyclic(extensions):
+			try:
+				manager.order(extensions)
+			except LookupError:
+				return False
+			
+			return True
+		
+		for i in range(300):
+			extensions = [Flagged('e' + str(j),
+					provides = tuple(rng.sample(features, rng.randrange(1, 3))),
+					uses = tuple(rng.sample(features, rng.randrange(3))),
+					first = rng.random() < 0.1,
+					last = rng.random() < 0.1,
+				) for j in range(rng.randrange(2, 7))]
+			
+			for ext in extensions:
+				ext.last = ext.last and not ext.first
+			
+			try:
+				graph = ExtensionGraph(extensions)
+			except LookupError:
+				assert not acyclic(extensions), extensions
+				continue
+			
+			assert acyclic(extensions), extensions
+			assert_valid(graph, extensions, manager)
+			
+			ext = rng.choice(extensions)  # Removal and addition are judged by the set which results.
+			remaining = [other for other in extensions if other is not ext]
+			
+			try:
+				graph.remove(ext)
+			except LookupError:
+				assert not acyclic(remaining), extensions
+				continue
+			
+			assert acyclic(remaining), extensions
+			assert_valid(graph, remaining, manager)
+			
+			try:
+				graph.add(ext)  # Now the latest provider of its features.
+			except LookupError:
+				assert not acyclic(remaining + [ext]), extensions
+				continue
+			
+			assert acyclic(remaining + [ext]), extensions
+			assert_valid(graph, remaining + [ext], manager)
+	
+	def test_manager_graph_updated_on_registration(self):
+		manager = ExtensionManager('marrow.package.sample')
+		graph = manager.graph
+		assert manager.graph is graph
+		assert len(graph) == len(manager.plugins)
+		
+		a, b = AExtension(), BExtension()
+		manager.register('b', b)
+		manager.register('a', a)
+		
+		assert manager.graph is graph
+		assert graph.order().index(a) < graph.order().index(b)
+		
+		manager.register('x', XExtension())  # Conflicts; the graph is discarded, raising on rebuild.
+		
+		with pytest.raises(RuntimeError):
+			manager.graph
+
+
+class TestPluginManager:
+	def test_eager_registration(self, plugin_path):
+		manager = PluginManager('marrow.package.test')
+		
+		assert 'throwaway' in sys.modules
+		assert [i.__name__ for i in manager] == ['Sample', 'Other']  # The broken plugin is skipped.
+	
+	def test_lazy_registration_imports_nothing(self, plugin_path):
+		manager = PluginManager('marrow.package.test', lazy=True)
+		
+		assert 'throwaway' not in sys.modules
+		assert 'throwaway_broken' not in sys.modules
+		assert len(manager.named) == 0
+	
+	def test_lazy_item_access(self, plugin_path):
+		manager = PluginManager('marrow.package.test', lazy=True)
+		plugin = manager['sample']
+		
+		assert plugin is sys.modules['throwaway'].Sample
+		assert manager.named['sample'] is plugin
+		assert 'throwaway_broken' not in sys.modules
+	
+	def test_lazy_attribute_access(self, plugin_path):
+		manager = PluginManager('marrow.package.test', lazy=True)
+		assert manager.other is sys.modules['throwaway'].Other
+	
+	def test_lazy_required_failure(self, plugin_path):
+		manager = PluginManager('marrow.package.test', lazy=True)
+		
+		with pytest.raises(ImportError):
+			manager['broken']
+	
+	def test_lazy_iteration(self, plugin_path):
+		manager = PluginManager('marrow.package.test', lazy=True)
+		iterator = iter(manager)
+		
+		assert next(iterator).__name__ == 'Sample'
+		assert 'throwaway_broken' not in sys.modules
+		assert next(iterator).__name__ == 'Other'  # The broken plugin is skipped.
+		assert len(manager.plugins) == 2
+	
+	def test_lazy_plugins_list(self, plugin_path):
+		manager = PluginManager('marrow.package.test', lazy=True)
+		assert [i.__name__ for i in manager.plugins] == ['Sample', 'Other']
+		assert not manager._pending
+	
+	def test_preload(self, plugin_path):
+		manager = PluginManager('marrow.package.test', lazy=True)
+		manager.preload()
+		
+		assert not manager._deferred
+		assert manager._plugins == [sys.modules['throwaway'].Sample, sys.modules['throwaway'].Other]
+	
+	def test_explicit_registration_overrides_deferred(self, plugin_path):
+		manager = PluginManager('marrow.package.test', lazy=True)
+		manager.register('sample', AExtension)
+		
+		assert manager['sample'] is AExtension
+		assert manager.plugins[-1] is AExtension
+		assert manager['sample'] is AExtension
+	
+	def test_warm(self, plugin_path):
+		manager = PluginManager('marrow.package.test', lazy=True)
+		timings = manager.warm(concurrency=2)
+		
+		assert set(timings) == {'sample', 'broken', 'other'}
+		assert all(duration >= 0 for duration in timings.values())
+		assert not manager._pending
+		assert manager._plugins == [sys.modules['throwaway'].Sample, sys.modules['throwaway'].Other]
+		assert manager.named['other'] is sys.modules['throwaway'].Other
+	
+	def test_warm_nothing_pending(self, plugin_path):
+		assert PluginManager('marrow.package.test').warm() == {}
+	
+	def test_warm_requires_threads(self, plugin_path):
+		with pytest.raises(ValueError):
+			PluginManager('marrow.package.test', lazy=True).warm(0)
+	
+	def test_stale_entry_point_skipped(self, plugin_path, caplog):
+		metadata = plugin_path / 'throwaway-1.0.dist-info' / 'entry_points.txt'
+		metadata.write_text(metadata.read_text() + "gone = throwaway:Gone\n")
+		
+		eager = PluginManager('marrow.package.test')
+		assert [i.__name__ for i in eager] == ['Sample', 'Other']
+		assert 'gone' in caplog.text
+		
+		caplog.clear()
+		lazy = PluginManager('marrow.package.test', lazy=True)
+		assert [i.__name__ for i in lazy.plugins] == ['Sample', 'Other']
+		assert 'gone' in caplog.text
+		
+		with pytest.raises(ImportError):
+			lazy['gone']
+	
+	def test_plugins_attribute_error_not_masked(self, plugin_path):
+		manager = PluginManager('marrow.package.test', lazy=True)
+		
+		def preload():
+			raise AttributeError('inner')
+		
+		manager.preload = preload
+		
+		with pytest.raises(RuntimeError, match='inner'):
+			manager.plugins
+	
+	def test_rescan(self, plugin_path):
+		manager = PluginManager('marrow.package.test')
+		assert manager.rescan() == []
+		
+		metadata = plugin_path / 'throwaway-1.0.dist-info' / 'entry_points.txt'
+		metadata.write_text(metadata.read_text() + "late = throwaway:Late\n")
+		(plugin_path / 'throwaway.py').write_text("class Sample: pass\nclass Other: pass\nclass Late: pass\n")
+		del sys.modules['throwaway']
+		
+		assert manager.rescan() == ['late']
+		assert manager.late is sys.modules['throwaway'].Late
+		assert manager.plugins[-1] is manager.late
+		assert manager.rescan() == []
+	
+	def test_rescan_lazy(self, plugin_path):
+		manager = PluginManager('marrow.package.test', lazy=True)
+		
+		metadata = plugin_path / 'throwaway-1.0.dist-info' / 'entry_points.txt'
+		metadata.write_text(metadata.read_text() + "late = throwaway:Other\n")
+		
+		assert manager.rescan() == ['late']
+		assert 'throwaway' not in sys.modules
+		assert manager['late'] is sys.modules['throwaway'].Other
+	
+	def test_rescan_lazy_graph(self, plugin_path, monkeypatch):
+		monkeypatch.delitem(sys.modules, 'throwaway_late', raising=False)  # Also removed once the test completes.
+		manager = ExtensionManager('marrow.package.test', lazy=True)
+		assert len(manager.graph) == 2
+		
+		metadata = plugin_path / 'throwaway-1.0.dist-info' / 'entry_points.txt'
+		metadata.write_text(metadata.read_text() + "late = throwaway_late:Late\n")
+		(plugin_path / 'throwaway_late.py').write_text("class Late:\n\tprovides = ('late', )\n")
+		
+		assert manager.rescan() == ['late']
+		assert len(manager.graph) == len(manager.plugins) == 3
+		assert manager['late'] in manager.graph
+	
+	def test_no_working_set(self, plugin_path, monkeypatch):
+		monkeypatch.delitem(sys.modules, 'pkg_resources', raising=False)
+		assert PluginManager('marrow.package.test').ws is None
+	
+	def test_working_set_subscription(self, plugin_path, monkeypatch):
+		class WorkingSet:
+			def subscribe(self, callback, existing=True):
+				self.callback = callback
+		
+		class Module:
+			working_set = WorkingSet()
+		
+		monkeypatch.setitem(sys.modules, 'pkg_resources', Module)
+		manager = PluginManager('marrow.package.test')
+		
+		assert manager.ws is Module.working_set
+		
+		metadata = plugin_path / 'throwaway-1.0.dist-info' / 'entry_points.txt'
+		metadata.write_text(metadata.read_text() + "late = throwaway:Other\n")
+		
+		Module.working_set.callback(None)  # As upon activation of a distribution.
+		assert manager.late is sys.modules['throwaway'].Other
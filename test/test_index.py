@@ -0,0 +1,143 @@
+import json
+import sys
+from threading import Thread
+from unittest import TestCase
+
+import pytest
+
+from test import helper
+from marrow.package import load, name, traverse
+from marrow.package.index import EntryPoint, EntryPointIndex, entry_points, fingerprint
+
+
+class TestEntryPointIndex(TestCase):
+	def test_namespace_contents(self):
+		assert set(entry_points['marrow.package.sample']) == {'name', 'load', 'traverse'}
+	
+	def test_namespace_presence(self):
+		assert 'marrow.package.sample' in entry_points
+		assert 'marrow.package.bogus' not in entry_points
+	
+	def test_unknown_namespace_is_empty(self):
+		assert not entry_points['marrow.package.bogus']
+	
+	def test_lookup(self):
+		assert entry_points.lookup('marrow.package.sample', 'traverse').load() is traverse
+	
+	def test_lookup_unknown(self):
+		with pytest.raises(LookupError):
+			entry_points.lookup('marrow.package.sample', 'bob.dole')
+	
+	def test_table_is_reused(self):
+		index = EntryPointIndex()
+		assert index.table is index.table
+	
+	def test_explicit_invalidation(self):
+		index = EntryPointIndex()
+		table = index.table
+		index.invalidate()
+		assert index.table is not table
+		assert index.lookup('marrow.package.sample', 'name').load() is name
+	
+	def test_path_change_invalidates(self):
+		index = EntryPointIndex()
+		table = index.table
+		sys.path.append('/nonexistent')
+		
+		try:
+			assert index.table is not table
+		finally:
+			sys.path.remove('/nonexistent')
+		
+		assert index.table is not table
+	
+	def test_concurrent_build(self):
+		index = EntryPointIndex()
+		tables = []
+		threads = [Thread(target=lambda: tables.append(index.table)) for i in range(8)]
+		
+		for thread in threads: thread.start()
+		for thread in threads: thread.join()
+		
+		assert len(tables) == 8
+		assert all(table is tables[0] for table in tables)
+	
+	def test_load_uses_index(self):
+		assert load('load', 'marrow.package.sample') is load
+
+
+class TestEntryPoint(TestCase):
+	def test_module_reference(self):
+		assert EntryPoint('sample', 'example.module', 'sample').reference == 'example.module'
+	
+	def test_object_reference(self):
+		assert EntryPoint('sample', 'example.module:Obj.attr', 'sample').reference == 'example.module:Obj.attr'
+	
+	def test_extras_are_ignored(self):
+		assert EntryPoint('sample', 'example.module:Obj [extra]', 'sample').reference == 'example.module:Obj'
+	
+	def test_load_module(self):
+		assert EntryPoint('sample', 'marrow.package.loader', 'sample').load() is sys.modules['marrow.package.loader']
+	
+	def test_load_nested(self):
+		assert EntryPoint('sample', 'test.helper:Example.Pandora', 'sample').load() is helper.Example.Pandora
+	
+	def test_load_missing_attribute(self):
+		with pytest.raises(ImportError):
+			EntryPoint('sample', 'test.helper:Example.Gone', 'sample').load()
+
+
+class TestSnapshot:
+	def test_fingerprint_is_stable(self):
+		assert fingerprint() == fingerprint()
+	
+	def test_fingerprint_tracks_path(self, tmp_path):
+		assert fingerprint() != fingerprint(sys.path + [str(tmp_path)])
+	
+	def test_fingerprint_tracks_distributions(self, tmp_path):
+		before = fingerprint([str(tmp_path)])
+		(tmp_path / 'example-1.0.dist-info').mkdir()
+		assert fingerprint([str(tmp_path)]) != before
+	
+	def test_snapshot_written_on_build(self, tmp_path):
+		snapshot = tmp_path / 'entry-points.json'
+		index = EntryPointIndex(str(snapshot))
+		index.table
+		
+		data = json.loads(snapshot.read_text())
+		assert data['fingerprint'] == fingerprint()
+		assert ['load', 'marrow.package.loader:load'] in data['table']['marrow.package.sample']
+	
+	def test_snapshot_skips_scan(self, tmp_path, monkeypatch):
+		snapshot = str(tmp_path / 'entry-points.json')
+		EntryPointIndex(snapshot).table
+		
+		index = EntryPointIndex(snapshot)
+		monkeypatch.setattr(EntryPointIndex, '_scan', None)  # Explodes if a scan is attempted.
+		
+		assert index.lookup('marrow.package.sample', 'traverse').load() is traverse
+	
+	def test_stale_snapshot_is_rebuilt(self, tmp_path):
+		snapshot = tmp_path / 'entry-points.json'
+		snapshot.write_text(json.dumps({'version': 1, 'fingerprint': 'stale', 'table': {}}))
+		
+		index = EntryPointIndex(str(snapshot))
+		assert 'marrow.package.sample' in index
+		assert json.loads(snapshot.read_text())['fingerprint'] == fingerprint()
+	
+	def test_corrupt_snapshot_is_rebuilt(self, tmp_path):
+		snapshot = tmp_path / 'entry-points.json'
+		snapshot.write_text('{"version":')
+		
+		index = EntryPointIndex(str(snapshot))
+		assert 'marrow.package.sample' in index
+		assert json.loads(snapshot.read_text())['fingerprint'] == fingerprint()
+	
+	def test_explicit_save(self, tmp_path):
+		snapshot = tmp_path / 'entry-points.json'
+		entry_points.save(str(snapshot))
+		assert 'marrow.package.sample' in json.loads(snapshot.read_text())['table']
+	
+	def test_save_requires_target(self):
+		with pytest.raises(ValueError):
+			EntryPointIndex().save()
@@ -1,7 +1,14 @@
+import asyncio
+import gc
+
 from test import helper
+from threading import Barrier, Thread
+from time import sleep
 from unittest import TestCase
 
-from marrow.package.lazy import lazy, lazyload
+import pytest
+
+from marrow.package.lazy import alazy, lazy, lazyload
 
 
 class MockObject:
@@ -45,6 +52,67 @@ class TestLazy(TestCase):
 		assert repr(MockObject.twentyseven.func) in repr(MockObject.twentyseven)
 
 
+class Concurrent:
+	def __init__(self, barrier=None):
+		self.barrier = barrier
+		self.calls = 0
+	
+	@lazy
+	def slow(self):
+		self.calls += 1
+		sleep(0.01)
+		return self.calls
+	
+	@lazy
+	def rendezvous(self):
+		self.barrier.wait(timeout=2)  # Breaks (raising) if instances are calculated one at a time.
+		return True
+	
+	@lazy
+	def broken(self):
+		self.calls += 1
+		raise ValueError()
+
+
+def concurrently(*targets):
+	threads = [Thread(target=target) for target in targets]
+	for thread in threads: thread.start()
+	for thread in threads: thread.join()
+
+
+class TestLazyConcurrency:
+	def test_calculated_once_per_instance(self):
+		obj = Concurrent()
+		results = []
+		
+		concurrently(*([lambda: results.append(obj.slow)] * 8))
+		
+		assert results == [1] * 8
+		assert obj.calls == 1
+		assert not Concurrent.slow.locks
+	
+	def test_instances_calculated_in_parallel(self):
+		barrier = Barrier(2)
+		first, second = Concurrent(barrier), Concurrent(barrier)
+		results = []
+		
+		concurrently(lambda: results.append(first.rendezvous), lambda: results.append(second.rendezvous))
+		
+		assert results == [True, True]
+		assert not barrier.broken
+	
+	def test_failure_not_cached(self):
+		obj = Concurrent()
+		
+		for i in range(2):
+			with pytest.raises(ValueError):
+				obj.broken
+		
+		assert obj.calls == 2
+		assert 'broken' not in obj.__dict__
+		assert not Concurrent.broken.locks
+
+
 class TestLazyLoad(TestCase):
 	def test_basic_lazyload(self):
 		obj = MockObject()
@@ -53,3 +121,184 @@ class TestLazyLoad(TestCase):
 	def test_targeted_lazyload(self):
 		obj = MockObject()
 		assert obj.lazytarget is helper.Example
+
+
+class Slotted:
+	__slots__ = ('calls', '_value', '_target')
+	
+	def __init__(self):
+		self.calls = 0
+	
+	def calculate(self):
+		self.calls += 1
+		return 27
+	
+	value = lazy(calculate, 'value', slot='_value')
+	target = lazyload('test.helper:Example', slot='_target')
+
+
+class Referenceable:
+	__slots__ = ('calls', '__weakref__')
+	
+	def __init__(self):
+		self.calls = 0
+	
+	@lazy
+	def value(self):
+		self.calls += 1
+		return [self.calls]
+
+
+class Bare:
+	__slots__ = ()
+	
+	value = lazy(lambda self: 27, 'value')
+
+
+class TestSlottedLazy:
+	def test_designated_slot(self):
+		obj = Slotted()
+		
+		assert obj.value == 27
+		assert obj.value == 27
+		assert obj.calls == 1
+		assert obj._value == 27
+		assert not hasattr(obj, '__dict__')
+	
+	def test_designated_slot_lazyload(self):
+		assert Slotted().target is helper.Example
+	
+	def test_side_table(self):
+		obj = Referenceable()
+		
+		assert obj.value is obj.value
+		assert obj.calls == 1
+		assert len(Referenceable.value.values) == 1
+		
+		other = Referenceable()
+		assert other.value is not obj.value
+		assert len(Referenceable.value.values) == 2
+	
+	def test_side_table_discarded_on_collection(self):
+		descriptor = Referenceable.value
+		obj = Referenceable()
+		obj.value
+		key = id(obj)
+		
+		assert key in descriptor.values
+		
+		del obj
+		gc.collect()
+		
+		assert key not in descriptor.values
+	
+	def test_unsupported(self):
+		with pytest.raises(TypeError, match='__weakref__'):
+			Bare().value
+
+
+class Remote:
+	def __init__(self):
+		self.calls = 0
+		self.failing = True
+	
+	@alazy
+	async def config(self):
+		self.calls += 1
+		await asyncio.sleep(0.01)
+		return {'calls': self.calls}
+	
+	@alazy
+	async def flaky(self):
+		self.calls += 1
+		await asyncio.sleep(0)
+		
+		if self.failing:
+			raise ValueError()
+		
+		return self.calls
+
+
+class TestAsyncLazy:
+	def test_awaiters_share_one_calculation(self):
+		obj = Remote()
+		
+		async def main():
+			return await asyncio.gather(*(obj.config for i in range(8)))
+		
+		results = asyncio.run(main())
+		
+		assert obj.calls == 1
+		assert all(result is results[0] for result in results)
+		assert not Remote.config.pending
+	
+	def test_result_cached(self):
+		obj = Remote()
+		
+		async def main():
+			first = await obj.config
+			return first, await obj.config
+		
+		first, second = asyncio.run(main())
+		
+		assert first is second
+		assert obj.calls == 1
+		assert obj.__dict__['config'].done()
+	
+	def test_instances_calculated_separately(self):
+		first, second = Remote(), Remote()
+		
+		async def main():
+			return await asyncio.gather(first.config, second.config)
+		
+		assert asyncio.run(main()) == [{'calls': 1}, {'calls': 1}]
+	
+	def test_failure_not_cached(self):
+		obj = Remote()
+		
+		async def main():
+			results = await asyncio.gather(obj.flaky, obj.flaky, return_exceptions=True)
+			assert obj.calls == 1
+			assert all(isinstance(result, ValueError) for result in results)
+			assert 'flaky' not in obj.__dict__
+			
+			obj.failing = False
+			return await obj.flaky
+		
+		assert asyncio.run(main()) == 2
+	
+	def test_cancelled_awaiter_does_not_cancel_calculation(self):
+		obj = Remote()
+		
+		async def main():
+			impatient = asyncio.ensure_future(obj.config)
+			patient = asyncio.ensure_future(obj.config)
+			await asyncio.sleep(0)
+			impatient.cancel()
+			
+			result = await patient
+			assert impatient.cancelled()
+			return result
+		
+		assert asyncio.run(main()) == {'calls': 1}
+		assert obj.calls == 1
+	
+	def test_cached_even_if_every_awaiter_cancelled(self):
+		obj = Remote()
+		
+		async def main():
+			awaiter = asyncio.ensure_future(obj.config)
+			await asyncio.sleep(0)
+			awaiter.cancel()
+			await asyncio.sleep(0.05)
+			return await obj.config
+		
+		assert asyncio.run(main()) == {'calls': 1}
+		assert obj.calls == 1
+	
+	def test_requires_running_loop(self):
+		with pytest.raises(RuntimeError):
+			Remote().config
+	
+	def test_repr(self):
+		assert repr(Remote.config).startswith('alazy(')
@@ -4,6 +4,7 @@ from unittest import TestCase
 import pytest
 
 from marrow.package import load, traverse
+from marrow.package.loader import compile, compile_reference
 
 
 class Recorder:
@@ -77,3 +78,82 @@ class TestLoader(TestCase):
 	def test_file_path(self):
 		assert load('test/example.md').replace('\\', '/').endswith('/test/example.md')
 
+
+class TestCompiledTraversal(TestCase):
+	def test_empty_traversal_returns_haystack(self):
+		assert compile('')(Recorder())._traversal == []
+	
+	def test_simple_attribute_reference_nested(self):
+		assert compile('foo.bar')(Recorder())._traversal == ['.foo', '.bar']
+	
+	def test_reference_numeric(self):
+		assert compile('27')(Recorder())._traversal == ['[27i]']
+	
+	def test_reference_negative_numeric(self):
+		assert compile('-1')(Recorder())._traversal == ['[-1i]']
+	
+	def test_reference_bogan(self):
+		assert compile('bogan')(Recorder())._traversal == ['[bogan]']
+	
+	def test_reference_protected(self):
+		assert compile('_hidden')(Recorder())._traversal == ['[_hidden]']
+		assert compile('_hidden', protect=False)(Recorder())._traversal == ['._hidden']
+	
+	def test_reference_callable(self):
+		assert compile('callable', executable=True)(Recorder())._traversal == ['!']
+	
+	def test_reference_bad(self):
+		with pytest.raises(LookupError):
+			compile('canary')(Recorder())
+	
+	def test_reference_default(self):
+		assert compile('canary', default=27)(Recorder()) == 27
+		assert compile('canary')(Recorder(), 42) == 42
+	
+	def test_alternate_separator(self):
+		assert compile('foo/0', separator='/')(Recorder())._traversal == ['.foo', '[0i]']
+	
+	def test_reusable(self):
+		accessor = compile('foo.1')
+		assert accessor(Recorder())._traversal == accessor(Recorder())._traversal == ['.foo', '[1i]']
+	
+	def test_repr(self):
+		assert repr(compile('foo.bar')) == "Traversal('foo.bar')"
+
+
+class TestCompiledReference(TestCase):
+	def test_invalid_import_nodefault(self):
+		with pytest.raises(ImportError):
+			compile_reference('foo.bar:baz')()
+	
+	def test_invalid_import_default(self):
+		assert compile_reference('foo.bar:baz', default="hi")() == "hi"
+		assert compile_reference('foo.bar:baz')("hi") == "hi"
+	
+	def test_basic_import(self):
+		assert compile_reference('test.helper:Example')() is helper.Example
+	
+	def test_nested_import(self):
+		assert compile_reference('test.helper:Example.Pandora.Box')() is helper.Example.Pandora.Box
+	
+	def test_executable_import(self):
+		assert compile_reference('test.helper:instance.instance', executable=True)() is helper.instance
+	
+	def test_basic_entrypoint(self):
+		assert compile_reference('traverse', 'marrow.package.sample')() is traverse
+	
+	def test_unknown_entrypoint(self):
+		with pytest.raises(LookupError):
+			compile_reference('bob.dole', 'console_scripts')()
+	
+	def test_file_path(self):
+		path = compile_reference('test/example.md')()
+		assert path.replace('\\', '/').endswith('/test/example.md')
+	
+	def test_file_attribute(self):
+		with pytest.raises(LookupError):
+			compile_reference('test.helper:Example/example.md')
+	
+	def test_repr(self):
+		assert repr(compile_reference('traverse', 'marrow.package.sample')) == \
+				"Reference('traverse', 'marrow.package.sample')"
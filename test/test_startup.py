@@ -0,0 +1,37 @@
+"""Import-time regression tests; importing the package must remain cheap."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+BUDGET = float(os.environ.get('TEST_IMPORT_BUDGET', 0.2))  # Seconds, best of several runs.
+
+SCRIPT = """
+import sys
+from time import perf_counter
+
+start = perf_counter()
+import {module}
+print(perf_counter() - start)
+print(' '.join(name for name in ('pkg_resources', 'importlib.metadata') if name in sys.modules))
+"""
+
+
+def measure(module):
+	output = subprocess.check_output([sys.executable, '-c', SCRIPT.format(module=module)], universal_newlines=True)
+	duration, loaded = (output.split('\n') + [''])[:2]
+	return float(duration), loaded.split()
+
+
+@pytest.mark.parametrize('module', ['marrow.package', 'marrow.package.host', 'marrow.package.lazy'])
+def test_import_avoids_costly_discovery_machinery(module):
+	duration, loaded = measure(module)
+	assert 'pkg_resources' not in loaded
+	assert 'importlib.metadata' not in loaded
+
+
+def test_import_budget():
+	duration = min(measure('marrow.package')[0] for i in range(3))
+	assert duration < BUDGET, "Importing marrow.package took {:.3f}s, over budget of {:.3f}s.".format(duration, BUDGET)
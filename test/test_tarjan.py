@@ -1,12 +1,15 @@
+from random import Random
 from unittest import TestCase
 
 import pytest
 
-from marrow.package.tarjan import Graph, robust_topological_sort, strongly_connected_components, topological_sort
+from marrow.package.tarjan import Graph, intern, robust_topological_sort, strongly_connected_components, \
+		topological_layers, topological_sort
 
 scc = strongly_connected_components
 ts = topological_sort
 rtc = robust_topological_sort
+tl = topological_layers
 
 
 class TestTarjan(TestCase):
@@ -51,3 +54,143 @@ class TestTarjan(TestCase):
 		# as per the other ugly cases, we expect to bomb
 		with pytest.raises(KeyError):
 			rtc(self.MISSING)
+	
+	def test_topological_layers_good(self):
+		# grouped from most dependent to least, as per the flat sort
+		assert tl(self.GOOD) == [['baz'], ['foo'], ['bar']]
+	
+	def test_topological_layers_bad(self):
+		# only resolvable items are returned
+		assert tl(self.BAD) == [['foo']]
+	
+	def test_topological_layers_ugly(self):
+		with pytest.raises(KeyError):
+			tl(self.MISSING)
+	
+	def test_topological_layers_stable(self):
+		# independent nodes share a layer, retaining their relative order as graph keys
+		graph = dict(d=[], c=['d'], b=['d'], a=['d'], e=[])
+		assert tl(graph) == [['c', 'b', 'a', 'e'], ['d']]
+
+
+def recursive_scc(graph):
+	"""The original, recursive, formulation of Tarjan's algorithm, as a reference implementation."""
+	
+	result, stack, low = [], [], {}
+	
+	def visit(node):
+		if node in low: return
+		
+		num = len(low)
+		low[node] = num
+		stack_pos = len(stack)
+		stack.append(node)
+		
+		for successor in graph[node]:
+			visit(successor)
+			low[node] = min(low[node], low[successor])
+		
+		if num == low[node]:
+			component = tuple(stack[stack_pos:])
+			del stack[stack_pos:]
+			result.append(component)
+			
+			for item in component:
+				low[item] = len(graph)
+	
+	for node in graph:
+		visit(node)
+	
+	return result
+
+
+class TestIterativeTarjan:
+	@pytest.mark.parametrize('seed', range(25))
+	def test_matches_recursive_formulation(self, seed):
+		rng = Random(seed)
+		size = rng.randrange(1, 60)
+		graph = {node: [rng.randrange(size) for i in range(rng.randrange(4))] for node in range(size)}
+		
+		assert scc(graph) == recursive_scc(graph)
+	
+	def test_self_reference(self):
+		assert scc({'foo': ['foo']}) == [('foo', )]
+	
+	def test_deep_chain(self):
+		depth = 100000
+		graph = {i: [i + 1] for i in range(depth)}
+		graph[depth] = []
+		
+		components = scc(graph)
+		
+		assert len(components) == depth + 1
+		assert components[0] == (depth, )
+		assert components[-1] == (0, )
+	
+	def test_deep_cycle(self):
+		depth = 10000
+		graph = {i: [(i + 1) % depth] for i in range(depth)}
+		
+		assert [sorted(i) for i in scc(graph)] == [list(range(depth))]
+	
+	def test_deep_robust_topological_sort(self):
+		depth = 10000
+		graph = {i: [i + 1] for i in range(depth)}
+		graph[depth] = []
+		
+		assert rtc(graph) == [(i, ) for i in range(depth + 1)]
+
+
+def legacy_robust_topological_sort(graph):
+	"""The original tuple-keyed formulation of the robust sort, as a reference implementation."""
+	
+	components = recursive_scc(graph)
+	node_component = {node: component for component in components for node in component}
+	component_graph = {component: [] for component in components}
+	
+	for node in graph:
+		for successor in graph[node]:
+			if node_component[node] != node_component[successor]:
+				component_graph[node_component[node]].append(node_component[successor])
+	
+	return ts(component_graph)
+
+
+class TestCompactTarjan:
+	def graph(self, seed):
+		rng = Random(seed)
+		size = rng.randrange(1, 60)
+		return {'n' + str(node): ['n' + str(rng.randrange(size)) for i in range(rng.randrange(4))] for node in range(size)}
+	
+	@pytest.mark.parametrize('seed', range(25))
+	def test_components_match(self, seed):
+		graph = self.graph(seed)
+		assert scc(graph, compact=True) == scc(graph)
+	
+	@pytest.mark.parametrize('seed', range(25))
+	def test_robust_topological_sort_matches(self, seed):
+		graph = self.graph(seed)
+		assert rtc(graph, compact=True) == rtc(graph) == legacy_robust_topological_sort(graph)
+	
+	def test_fixtures(self):
+		assert scc(TestTarjan.GOOD, compact=True) == [('bar', ), ('foo', ), ('baz', )]
+		assert rtc(TestTarjan.GOOD, compact=True) == [('baz', ), ('foo', ), ('bar', )]
+		assert [tuple(sorted(i)) for i in rtc(TestTarjan.BAD, compact=True)] == [('foo', ), ('bar', 'baz')]
+	
+	def test_missing(self):
+		with pytest.raises(KeyError):
+			rtc(TestTarjan.MISSING, compact=True)
+	
+	def test_intern(self):
+		nodes, offsets, targets = intern(TestTarjan.GOOD)
+		
+		assert nodes == ['foo', 'bar', 'baz']
+		assert list(offsets) == [0, 1, 1, 2]
+		assert list(targets) == [1, 0]
+	
+	def test_giant_component(self):
+		depth = 20000
+		graph = {i: [(i + 1) % depth, (i + 7) % depth] for i in range(depth)}
+		
+		assert [len(i) for i in rtc(graph, compact=True)] == [depth]
+		assert [len(i) for i in rtc(graph)] == [depth]
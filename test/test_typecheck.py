@@ -0,0 +1,49 @@
+"""Verify the selection of runtime type checking of public interfaces."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from marrow.package import load, traverse
+from marrow.package.typecheck import CHECKED
+
+SCRIPT = """
+import sys
+from marrow.package import load
+from marrow.package.typecheck import CHECKED
+print(CHECKED, hasattr(load, '__wrapped__'), 'typeguard' in sys.modules)
+"""
+
+
+def probe(*flags, **environ):
+	env = {key: value for key, value in os.environ.items() if key != 'MARROW_PACKAGE_UNCHECKED'}
+	env.update(environ)
+	output = subprocess.check_output([sys.executable, *flags, '-c', SCRIPT], env=env, universal_newlines=True)
+	return output.split()
+
+
+def test_checked_under_test():
+	assert CHECKED
+	assert hasattr(load, '__wrapped__')
+	
+	with pytest.raises(TypeError):
+		traverse(object(), 27)
+
+
+def test_checked_by_default():
+	assert probe() == ['True', 'True', 'True']
+
+
+@pytest.mark.parametrize('value', ['1', 'yes', 'true'])
+def test_unchecked_via_environment(value):
+	assert probe(MARROW_PACKAGE_UNCHECKED=value) == ['False', 'False', 'False']
+
+
+def test_explicitly_checked_via_environment():
+	assert probe(MARROW_PACKAGE_UNCHECKED='0') == ['True', 'True', 'True']
+
+
+def test_unchecked_when_optimized():
+	assert probe('-O') == ['False', 'False', 'False']